@@ -1,11 +1,227 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import dask
 import numpy as np
 import xarray as xr
 
-from .prediction import compute_perfect_model, compute_persistence_pm
+from xskillscore import mae as _mae
+from xskillscore import pearson_r as _pearson_r
+from xskillscore import rmse as _rmse
+
+from .prediction import (_gather_persistence_pm, _get_control_init_index,
+                         _get_metric, _get_variance, _metric_names,
+                         _persistence_pm_from_index, compute_perfect_model)
 from .stats import DPP, xr_varweighted_mean_period
 
+# bytes of resampled control a batch of _bootstrap_control_threshold may hold
+_CONTROL_BATCH_BYTES = 2 ** 27
+
+def _n_workers(n_jobs=None):
+    """Number of worker processes requested by n_jobs.
+
+    Negative values count back from the number of cores as in joblib: -1
+    uses all cores, -2 all but one and so on, but at least one.
+
+    Args:
+        n_jobs (int): number of worker processes. Default: None (serial).
+
+    Returns:
+        n_workers (int): number of worker processes, at least one.
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs == 0:
+        raise ValueError("n_jobs must be a positive or negative integer, "
+                         "found 0")
+    if n_jobs < 0:
+        return max(1, os.cpu_count() + 1 + n_jobs)
+    return n_jobs
+
 
-def _pseudo_ens(ds, control):
+def _executor_imap(func, iterable, n_jobs=None, executor=None):
+    """Lazily map func over iterable serially, on an executor or on a process
+    pool.
+
+    Results are yielded in the order of iterable, so they do not depend on
+    the number of workers.
+
+    Args:
+        func (function): picklable function taking one item of iterable.
+        iterable (iterable): items to map over.
+        n_jobs (int): number of worker processes if no executor is given,
+                      see _n_workers. Default: None (serial).
+        executor (object): anything with a concurrent.futures-like `map`
+                           method, e.g. a ThreadPoolExecutor,
+                           ProcessPoolExecutor or the executor of a dask
+                           distributed client (`client.get_executor()`).
+
+    Yields:
+        result: func applied to the next item of iterable.
+    """
+    items = list(iterable)
+    n_workers = _n_workers(n_jobs)
+    if executor is not None:
+        yield from executor.map(func, items)
+    elif n_workers == 1:
+        for item in items:
+            yield func(item)
+    else:
+        # send several items per task so large inputs are pickled less often
+        chunksize = max(1, len(items) // (4 * n_workers))
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            yield from pool.map(func, items, chunksize=chunksize)
+
+
+def _executor_map(func, iterable, n_jobs=None, executor=None):
+    """Map func over iterable, see _executor_imap.
+
+    Returns:
+        results (list): func applied to every item of iterable.
+    """
+    return list(_executor_imap(func, iterable, n_jobs=n_jobs,
+                               executor=executor))
+
+
+class _P2Quantile:
+    """Streaming estimate of a quantile for every element of an array.
+
+    Implements the P-square algorithm, which tracks five markers per element
+    instead of storing the observations. Until an element has five
+    observations, its quantile is computed exactly. NaNs are skipped.
+
+    Reference:
+    * Jain, R., and I. Chlamtac. “The P2 Algorithm for Dynamic Calculation of
+        Quantiles and Histograms without Storing Observations.”
+        Communications of the ACM 28, no. 10 (1985): 1076–85.
+        https://doi.org/10.1145/4372.4378.
+
+    Args:
+        q (float): quantile to estimate, between 0 and 1.
+        shape (tuple): shape of the observations.
+    """
+
+    def __init__(self, q, shape):
+        self.q = q
+        self.shape = shape
+        size = int(np.prod(shape))
+        self.count = np.zeros(size, dtype=int)
+        # first five observations, then marker heights
+        self.heights = np.full((5, size), np.nan)
+        self.positions = np.tile(np.arange(1., 6.)[:, np.newaxis], (1, size))
+        # increments of the desired marker positions per observation
+        self.increments = np.array([0, q / 2, q, (1 + q) / 2, 1])
+
+    def update(self, x):
+        """Add one observation of shape `shape`."""
+        x = np.asarray(x, dtype=float).reshape(-1)
+        valid = ~np.isnan(x)
+        # collect the first five observations of every element
+        fill = valid & (self.count < 5)
+        if fill.any():
+            cells = np.nonzero(fill)[0]
+            self.heights[self.count[cells], cells] = x[cells]
+            self.count[cells] += 1
+            ready = cells[self.count[cells] == 5]
+            self.heights[:, ready] = np.sort(self.heights[:, ready], axis=0)
+        cells = np.nonzero(valid & ~fill)[0]
+        if cells.size == 0:
+            return
+        x = x[cells]
+        h = self.heights[:, cells]
+        n = self.positions[:, cells]
+        h[0] = np.minimum(h[0], x)
+        h[4] = np.maximum(h[4], x)
+        # cell k with h[k] <= x < h[k + 1]; markers above it move up
+        k = (h[1:4] <= x).sum(axis=0)
+        n += np.arange(5)[:, np.newaxis] > k
+        count = self.count[cells] + 1
+        desired = 1 + (count - 1) * self.increments[:, np.newaxis]
+        for i in range(1, 4):
+            d = desired[i] - n[i]
+            move = (((d >= 1) & (n[i + 1] - n[i] > 1)) |
+                    ((d <= -1) & (n[i - 1] - n[i] < -1)))
+            d = np.where(move, np.sign(d), 0.)
+            # piecewise parabolic prediction, linear if not monotonic
+            parabolic = h[i] + d / (n[i + 1] - n[i - 1]) * (
+                (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) /
+                (n[i + 1] - n[i]) + (n[i + 1] - n[i] - d) *
+                (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+            h_next = np.where(d > 0, h[i + 1], h[i - 1])
+            n_next = np.where(d > 0, n[i + 1], n[i - 1])
+            linear = h[i] + d * (h_next - h[i]) / (n_next - n[i])
+            monotonic = (h[i - 1] < parabolic) & (parabolic < h[i + 1])
+            h[i] = np.where(move, np.where(monotonic, parabolic, linear),
+                            h[i])
+            n[i] += d
+        self.heights[:, cells] = h
+        self.positions[:, cells] = n
+        self.count[cells] = count
+
+    def result(self):
+        """Current quantile estimate of shape `shape`."""
+        res = self.heights[2].copy()
+        few = (self.count > 0) & (self.count < 5)
+        if few.any():
+            with np.errstate(all='ignore'):
+                res[few] = np.nanquantile(self.heights[:, few], self.q,
+                                          axis=0)
+        res[self.count == 0] = np.nan
+        return res.reshape(self.shape)
+
+
+class _StreamingQuantiles:
+    """Quantiles of a distribution of xarray objects accumulated one
+    realization at a time with _P2Quantile.
+
+    Args:
+        q (list of float): quantiles to estimate.
+        dim (str): dimension the realizations are stacked along in update.
+                   Default: 'bootstrap'
+    """
+
+    def __init__(self, q, dim='bootstrap'):
+        self.q = list(q)
+        self.dim = dim
+        self.template = None
+        self.estimators = None
+
+    def update(self, ds):
+        """Add all realizations of ds along dim."""
+        for i in range(ds[self.dim].size):
+            sample = ds.isel({self.dim: i}, drop=True)
+            if self.template is None:
+                self.template = sample
+                self.estimators = {
+                    name: [_P2Quantile(q, da.shape) for q in self.q]
+                    for name, da in _data_arrays(sample).items()}
+            for name, da in _data_arrays(sample).items():
+                for estimator in self.estimators[name]:
+                    estimator.update(da.values)
+
+    def result(self):
+        """Quantiles with leading dimension quantile like `.quantile`."""
+        res = []
+        for i, _ in enumerate(self.q):
+            data = {name: estimators[i].result()
+                    for name, estimators in self.estimators.items()}
+            if isinstance(self.template, xr.DataArray):
+                data = data[None]
+            res.append(self.template.copy(data=data))
+        res = xr.concat(res, 'quantile')
+        res['quantile'] = self.q
+        return res
+
+
+def _data_arrays(ds):
+    """Map variable names to DataArrays, with None for a DataArray."""
+    if isinstance(ds, xr.DataArray):
+        return {None: ds}
+    return dict(ds.data_vars)
+
+
+def _pseudo_ens(ds, control, rng=None):
     """
     Create a pseudo-ensemble from control run.
 
@@ -16,32 +232,136 @@ def _pseudo_ens(ds, control):
     Args:
         ds (xarray object): ensemble simulation.
         control (xarray object): control simulation.
+        rng (np.random.RandomState): random state to draw the segments from.
+                                     Default: None (global numpy state).
 
     Returns:
         ds_e (xarray object): pseudo-ensemble generated from control run.
     """
+    length = ds.time.size
+    # random segment starts, then one gather of all segments from the
+    # windows of control
+    starts = _pseudo_ens_starts(ds, control, rng=rng)
+    index = starts[:, :, np.newaxis] + np.arange(length)
+    if 'time' in control.coords:
+        control = control.drop('time')
+    ds_e = control.isel(time=xr.DataArray(
+        index, dims=['initialization', 'member', 'time']))
+    ds_e['time'] = ds['time']
+    return ds_e
+
+
+def _pseudo_ens_starts(ds, control, rng=None):
+    """Draw the control positions where the segments of a pseudo-ensemble
+    start, see _pseudo_ens.
+
+    Returns:
+        starts (np.ndarray): positions along control time with shape
+                             (initialization, member).
+    """
+    if rng is None:
+        rng = np.random
     nens = ds.initialization.size
     nmember = ds.member.size
     length = ds.time.size
     c_start = 0
     c_end = control['time'].size
-    time = ds['time']
+    return rng.randint(c_start, c_end - length - 1, (nens, nmember))
+
+
+def _pseudo_ens_first_lead(ds, control, rngs):
+    """First lead of the pseudo-ensembles drawn from several random states.
+
+    Equivalent to stacking `_pseudo_ens(ds, control, rng).isel(time=0)` for
+    every rng along dimension bootstrap, but only gathers the first time
+    step of every segment.
+
+    Args:
+        ds (xarray object): ensemble simulation.
+        control (xarray object): control simulation.
+        rngs (list of np.random.RandomState): random states to draw from.
+
+    Returns:
+        ds_e (xarray object): first lead of the pseudo-ensembles with
+                              dimensions bootstrap, initialization and
+                              member.
+    """
+    starts = np.stack([_pseudo_ens_starts(ds, control, rng=rng)
+                       for rng in rngs])
+    if 'time' in control.coords:
+        control = control.drop('time')
+    ds_e = control.isel(time=xr.DataArray(
+        starts, dims=['bootstrap', 'initialization', 'member']))
+    return ds_e.assign_coords(time=ds['time'][0])
+
+
+def _resampled_control_statistic(index, func, control, dim='time',
+                                 **kwargs):
+    """Apply func to several resamples of control at once.
+
+    Args:
+        index (np.ndarray): positions along dim of every resample with shape
+                            (bootstrap, control[dim].size).
+        func (function): function of a control simulation.
+        control (xarray object): control simulation.
+        dim (str): dimension to resample. Default: 'time'
+        **kwargs: passed to func.
 
-    def isel_years(control, year_s, m=None, length=length):
-        new = control.isel(time=slice(year_s, year_s + length))
-        new['time'] = time
-        return new
+    Returns:
+        res (xarray object): func of the resamples with dimension bootstrap.
+    """
+    smp_control = control
+    if dim in smp_control.coords:
+        smp_control = smp_control.drop(dim)
+    smp_control = smp_control.isel(
+        {dim: xr.DataArray(index, dims=['bootstrap', dim])})
+    smp_control[dim] = control[dim]
+    return func(smp_control, **kwargs)
 
-    def create_pseudo_members(control):
-        startlist = np.random.randint(c_start, c_end - length - 1, nmember)
-        return xr.concat([isel_years(control, start) for start in startlist],
-                         'member')
 
-    return xr.concat([create_pseudo_members(control) for _ in range(nens)],
-                     'initialization')
+def _bootstrap_control_threshold(func, control, sig=95, bootstrap=500,
+                                 n_jobs=None, batch_size=None, **kwargs):
+    """Quantile of func applied to control resampled in time with
+    replacement.
 
+    All resampling indices are drawn up front, so results do not depend on
+    n_jobs or batch_size. Each call of func sees batch_size resamples, so
+    a worker holds at most batch_size copies of control at a time.
 
-def DPP_threshold(control, sig=95, bootstrap=500, **dpp_kwargs):
+    Args:
+        func (function): function of a control simulation.
+        control (xarray object): control simulation.
+        sig (int): significance level in percent. Default: 95
+        bootstrap (int): number of resampling iterations. Default: 500
+        n_jobs (int): number of processes to distribute the batches over,
+                      see _n_workers. Default: None (serial).
+        batch_size (int): number of resamples evaluated at once along a
+                          bootstrap dimension. Default: None (as many as
+                          fit into _CONTROL_BATCH_BYTES, at most an even
+                          share of bootstrap per process).
+        **kwargs: passed to func.
+
+    Returns:
+        threshold (xarray object): quantile sig / 100 of the resampled func.
+    """
+    time_size = control['time'].size
+    # same draws as np.random.choice(time, len(time)) for every iteration
+    index = np.random.randint(0, time_size, (bootstrap, time_size))
+    if batch_size is None:
+        batch_size = min(int(np.ceil(bootstrap / _n_workers(n_jobs))),
+                         max(1, _CONTROL_BATCH_BYTES // control.nbytes))
+    batches = [index[i:i + batch_size]
+               for i in range(0, bootstrap, batch_size)]
+    resampled = _executor_map(
+        partial(_resampled_control_statistic, func=func, control=control,
+                **kwargs), batches, n_jobs=n_jobs)
+    threshold = xr.concat(resampled, 'bootstrap').quantile(
+        sig / 100, 'bootstrap')
+    return threshold
+
+
+def DPP_threshold(control, sig=95, bootstrap=500, n_jobs=None,
+                  batch_size=None, **dpp_kwargs):
     """Calc DPP from re-sampled dataset.
 
     Reference:
@@ -50,37 +370,348 @@ def DPP_threshold(control, sig=95, bootstrap=500, **dpp_kwargs):
         Geophysical Research Letters 38, no. 7 (2011).
         https://doi.org/10/ft272w.
 
+    Args:
+        control (xr.DataArray): control simulation with time dimension as
+                                years.
+        sig (int): significance level in percent. Default: 95
+        bootstrap (int): number of resampling iterations. Default: 500
+        n_jobs (int): number of processes to distribute the iterations
+                      over. -1 uses all cores, -2 all but one and so on.
+                      Default: None (serial).
+        batch_size (int): number of iterations evaluated at once. Default:
+                          None (bounded by memory and split over n_jobs).
+        **dpp_kwargs: passed to DPP.
+
+    Returns:
+        threshold (xr.DataArray): DPP threshold.
     """
-    bootstraped_results = []
-    time = control.time.values
-    for _ in range(bootstrap):
-        smp_time = np.random.choice(time, len(time))
-        smp_control = control.sel(time=smp_time)
-        smp_control['time'] = time
-        bootstraped_results.append(DPP(smp_control, **dpp_kwargs))
-    threshold = xr.concat(bootstraped_results, 'bootstrap').quantile(
-        sig / 100, 'bootstrap')
-    return threshold
+    return _bootstrap_control_threshold(DPP, control, sig=sig,
+                                        bootstrap=bootstrap, n_jobs=n_jobs,
+                                        batch_size=batch_size, **dpp_kwargs)
 
 
 def xr_varweighted_mean_period_threshold(control,
                                          sig=95,
                                          bootstrap=500,
+                                         n_jobs=None,
+                                         batch_size=None,
                                          **vwmp_kwargs):
     """Calc vwmp from re-sampled dataset.
 
+    Args:
+        control (xr.DataArray): control simulation.
+        sig (int): significance level in percent. Default: 95
+        bootstrap (int): number of resampling iterations. Default: 500
+        n_jobs (int): number of processes to distribute the iterations
+                      over. -1 uses all cores, -2 all but one and so on.
+                      Default: None (serial).
+        batch_size (int): number of iterations evaluated at once. Default:
+                          None (bounded by memory and split over n_jobs).
+        **vwmp_kwargs: passed to xr_varweighted_mean_period.
+
+    Returns:
+        threshold (xr.DataArray): vwmp threshold.
     """
-    bootstraped_results = []
-    time = control.time.values
-    for _ in range(bootstrap):
-        smp_time = np.random.choice(time, len(time))
-        smp_control = control.sel(time=smp_time)
-        smp_control['time'] = time
-        bootstraped_results.append(
-            xr_varweighted_mean_period(smp_control, **vwmp_kwargs))
-    threshold = xr.concat(bootstraped_results, 'bootstrap').quantile(
-        sig / 100, 'bootstrap')
-    return threshold
+    return _bootstrap_control_threshold(xr_varweighted_mean_period, control,
+                                        sig=sig, bootstrap=bootstrap,
+                                        n_jobs=n_jobs, batch_size=batch_size,
+                                        **vwmp_kwargs)
+
+
+def _persistence_pm_statistics(ds, control, nlags, metric='pearson_r'):
+    """Per-initialization terms of the persistence skill of ds in control.
+
+    The persistence skill of any resample of the initializations of ds is
+    a weighted sum of these terms, see _persistence_pm_from_statistics.
+    For metrics without such terms (see _Metric), the control and the
+    positions of the initializations are kept instead to gather the drawn
+    initializations of all resamples at once.
+
+    Args:
+        ds (xarray object): ensemble with dimension initialization.
+        control (xarray object): control with dimension time.
+        nlags (int): number of lags.
+        metric (str): metric name, see compute_persistence_pm.
+
+    Returns:
+        statistics (dict): metric function and xarray objects with
+                           positional dimension initialization and lags in
+                           dimension time, labeled like the leads of ds.
+
+    Raises:
+        ValueError: if metric requires the control.
+    """
+    metric = _get_metric(metric)
+    if metric.requires_control:
+        raise ValueError('Please select between the following metrics: '
+                         + _metric_names(lambda m: not m.requires_control))
+    inits_index = _get_control_init_index(ds, control)
+    # label the lags like the leads of ds, so persistence aligns with the
+    # initialized skill, e.g. when differencing both for p values
+    lead = np.arange(1, 1 + nlags)
+    if nlags <= ds.time.size:
+        lead = ds['time'].values[:nlags]
+    if not metric.statistics:
+        return {'control': control, 'inits_index': inits_index,
+                'nlags': nlags, 'metric': metric.function, 'time': lead}
+    metric = metric.function
+    ref, fct = _gather_persistence_pm(control, inits_index, nlags)
+    ref = ref.rename({'time': 'initialization', 'lag': 'time'})
+    fct = fct.rename({'time': 'initialization'})
+    if metric is _pearson_r:
+        # correlation is shift invariant, centering avoids cancellation
+        mean = control.mean('time')
+        x, y = xr.broadcast(fct - mean, ref - mean)
+        terms = {'x': x, 'y': y, 'xx': x**2, 'yy': y**2, 'xy': x * y}
+    elif metric is _mae:
+        terms = {'e': abs(ref - fct)}
+    else:
+        terms = {'e': (ref - fct)**2}
+    statistics = {}
+    isnull = terms['xy' if 'xy' in terms else 'e'].isnull()
+    # for dask-backed input the indicator is kept without checking to not
+    # trigger a computation
+    if _is_dask(isnull) or isnull.any():
+        # missing values propagate like in the metric for drawn
+        # initializations
+        statistics['nan'] = isnull.astype('float')
+        terms = {k: v.fillna(0) for k, v in terms.items()}
+    statistics.update(terms)
+    statistics['time'] = lead
+    statistics['metric'] = metric
+    return statistics
+
+
+def _weighted_sum(ds, weights, dim='initialization'):
+    """Sum ds weighted with a DataArray over dim."""
+    if isinstance(ds, xr.Dataset):
+        return ds.map(_weighted_sum, weights=weights, dim=dim)
+    return xr.dot(ds, weights, dims=dim)
+
+
+def _persistence_pm_from_statistics(statistics, counts):
+    """Persistence skill of resampled initializations.
+
+    Args:
+        statistics (dict): see _persistence_pm_statistics.
+        counts (xr.DataArray): number of times every initialization is drawn
+                               with dimension initialization, optionally
+                               with additional dimension bootstrap.
+
+    Returns:
+        pers (xarray object): persistence skill with lags in dimension time.
+    """
+    if 'inits_index' in statistics:
+        # every resample as sorted positions of the drawn initializations
+        counts = counts.transpose(..., 'initialization')
+        ninit = counts.initialization.size
+        index = np.stack([np.repeat(np.arange(ninit), c)
+                          for c in counts.values.reshape(-1, ninit)])
+        index = statistics['inits_index'][index].reshape(
+            counts.shape[:-1] + (-1,))
+        index = xr.DataArray(index, dims=counts.dims[:-1] + ('time',))
+        pers = _persistence_pm_from_index(statistics['control'], index,
+                                          statistics['nlags'],
+                                          statistics['metric'])
+        pers['time'] = statistics['time']
+        return pers
+    n = counts.sum('initialization')
+    sums = {k: _weighted_sum(statistics[k], counts)
+            for k in statistics if k not in ['time', 'metric']}
+    metric = statistics['metric']
+    if metric is _pearson_r:
+        mx = sums['x'] / n
+        my = sums['y'] / n
+        cov = sums['xy'] / n - mx * my
+        pers = cov / np.sqrt((sums['xx'] / n - mx**2) *
+                             (sums['yy'] / n - my**2))
+    else:
+        pers = sums['e'] / n
+        if metric is _rmse:
+            pers = np.sqrt(pers)
+    if 'nan' in sums:
+        pers = pers.where(sums['nan'] == 0)
+    pers['time'] = statistics['time']
+    return pers.transpose('time', *[d for d in pers.dims if d != 'time'])
+
+
+def _bootstrap_perfect_model_iteration(seed, ds, control, metric, comparison,
+                                       compute_uninitialized_skill,
+                                       pers_statistics, running,
+                                       reference_period,
+                                       control_variance=None):
+    """One resampling iteration of bootstrap_perfect_model.
+
+    All random draws come from a random state seeded with `seed`, so the
+    result only depends on the seed and not on where the iteration runs.
+    Persistence skill is assembled from pers_statistics, see
+    _persistence_pm_statistics, or skipped if it is None. control_variance
+    is passed to compute_perfect_model.
+
+    Returns:
+        init, uninit, pers (xarray objects): skill of the resampled
+                                             initialized, uninitialized and
+                                             persistence forecasts. uninit
+                                             and pers are None if not
+                                             requested.
+    """
+    rng = np.random.RandomState(seed)
+    ninit = ds.initialization.size
+    # resample initializations by position with replacement
+    index = rng.randint(0, ninit, ninit)
+    smp_ds = ds.isel(initialization=index)
+    init = compute_perfect_model(smp_ds, control, metric=metric,
+                                 comparison=comparison, running=running,
+                                 reference_period=reference_period,
+                                 control_variance=control_variance)
+    uninit, pers = None, None
+    if compute_uninitialized_skill:
+        # generate the first lead of an uninitialized ensemble from control
+        uninit_ds = _pseudo_ens_first_lead(ds, control, [rng]).isel(
+            bootstrap=0, drop=True)
+        uninit = compute_perfect_model(uninit_ds, control, metric=metric,
+                                       comparison=comparison,
+                                       running=running,
+                                       reference_period=reference_period,
+                                       control_variance=control_variance)
+    if pers_statistics is not None:
+        counts = xr.DataArray(np.bincount(index, minlength=ninit),
+                              dims='initialization')
+        pers = _persistence_pm_from_statistics(pers_statistics, counts)
+    return init, uninit, pers
+
+
+def _bootstrap_perfect_model_batch(seeds, ds, control, metric, comparison,
+                                   compute_uninitialized_skill,
+                                   pers_statistics, running,
+                                   reference_period, control_variance=None):
+    """Several resampling iterations of bootstrap_perfect_model at once.
+
+    Draws the same samples as _bootstrap_perfect_model_iteration for every
+    seed, but stacks them along a new `bootstrap` dimension and evaluates the
+    skill of the whole stack in one call.
+
+    Returns:
+        init, uninit, pers (xarray objects): skill of the resampled
+                                             initialized, uninitialized and
+                                             persistence forecasts with
+                                             dimension bootstrap. uninit and
+                                             pers are None if not requested.
+    """
+    rngs = [np.random.RandomState(seed) for seed in seeds]
+    ninit = ds.initialization.size
+    # resample initializations by position with replacement, one row per
+    # iteration
+    index = np.stack([rng.randint(0, ninit, ninit) for rng in rngs])
+    smp_ds = ds
+    if 'initialization' in smp_ds.coords:
+        smp_ds = smp_ds.drop('initialization')
+    smp_ds = smp_ds.isel(initialization=xr.DataArray(
+        index, dims=['bootstrap', 'initialization']))
+    init = compute_perfect_model(smp_ds, control, metric=metric,
+                                 comparison=comparison, running=running,
+                                 reference_period=reference_period,
+                                 control_variance=control_variance)
+    uninit, pers = None, None
+    if compute_uninitialized_skill:
+        # generate the first lead of uninitialized ensembles from control
+        uninit_ds = _pseudo_ens_first_lead(ds, control, rngs)
+        uninit = compute_perfect_model(uninit_ds, control, metric=metric,
+                                       comparison=comparison,
+                                       running=running,
+                                       reference_period=reference_period,
+                                       control_variance=control_variance)
+    if pers_statistics is not None:
+        counts = np.zeros(index.shape, dtype=int)
+        np.add.at(counts, (np.arange(len(seeds))[:, np.newaxis], index), 1)
+        counts = xr.DataArray(counts, dims=['bootstrap', 'initialization'])
+        pers = _persistence_pm_from_statistics(pers_statistics, counts)
+    # same dimension order as concatenating single iterations
+    init, uninit, pers = (None if res is None else
+                          res.transpose('bootstrap', ...)
+                          for res in (init, uninit, pers))
+    return init, uninit, pers
+
+
+def _is_dask(ds):
+    """Whether an xarray object is backed by dask arrays."""
+    return bool(ds.chunks)
+
+
+def _distribution_to_ci(ds, ci_low, ci_high, dim='bootstrap'):
+    """Get quantiles ci_low and ci_high of a distribution along dim.
+
+    dask-backed input stays lazy, dim is merged into a single chunk as
+    required by quantile.
+    """
+    if _is_dask(ds):
+        ds = ds.chunk({dim: -1})
+    ds_ci = ds.quantile(q=[ci_low, ci_high], dim=dim)
+    return ds_ci
+
+
+def _pvalue_from_exceedances(count, size, metric='pearson_r'):
+    """Get probability that skill of a simple forecast is larger than init
+    skill from the number of realizations where it is."""
+    pv = count / size
+    if not _get_metric(metric).positive:
+        pv = 1 - pv
+    return pv
+
+
+def _pvalue_from_distributions(simple_fct, init, metric='pearson_r',
+                               dim='bootstrap'):
+    """Get probability that skill of simple_fct is larger than
+    init skill."""
+    return _pvalue_from_exceedances(((simple_fct - init) > 0).sum(dim),
+                                    init[dim].size, metric=metric)
+
+
+def _stream_bootstrap_results(results, q, q_pers, metric, compute_ci=True):
+    """Reduce bootstrap results to confidence levels and p values one
+    iteration or batch at a time.
+
+    Quantiles are estimated with _StreamingQuantiles and exceedances are
+    counted exactly, so memory does not grow with the number of iterations.
+    dask-backed results are computed once per iteration or batch.
+
+    Args:
+        results (iterable): (init, uninit, pers) tuples as returned by
+                            _bootstrap_perfect_model_iteration or
+                            _bootstrap_perfect_model_batch.
+        q (list of float): quantiles of init and uninit skill.
+        q_pers (list of float): quantiles of persistence skill.
+        metric (str): metric name to orient the p values.
+        compute_ci (bool): estimate quantiles. Defaults to True.
+
+    Returns:
+        init_ci, uninit_ci, pers_ci, p_uninit_over_init, p_pers_over_init
+        (xarray objects): see bootstrap_perfect_model, None if not computed.
+    """
+    quantiles = [_StreamingQuantiles(q), _StreamingQuantiles(q),
+                 _StreamingQuantiles(q_pers)]
+    counts = [None, None]
+    size = 0
+    for res in results:
+        res = [r if r is None or 'bootstrap' in r.dims else
+               r.expand_dims('bootstrap') for r in dask.compute(*res)]
+        init = res[0]
+        size += init.bootstrap.size
+        for i, r in enumerate(res):
+            if r is None:
+                continue
+            if compute_ci:
+                quantiles[i].update(r)
+            if i > 0:
+                count = ((r - init) > 0).sum('bootstrap')
+                counts[i - 1] = (count if counts[i - 1] is None else
+                                 counts[i - 1] + count)
+    cis = [qs.result() if qs.template is not None else None
+           for qs in quantiles]
+    pvalues = [None if count is None else
+               _pvalue_from_exceedances(count, size, metric=metric)
+               for count in counts]
+    return (*cis, *pvalues)
 
 
 def bootstrap_perfect_model(ds,
@@ -95,7 +726,12 @@ def bootstrap_perfect_model(ds,
                             compute_ci=True,
                             nlags=None,
                             running=None,
-                            reference_period='MK'):
+                            reference_period='MK',
+                            seed=None,
+                            n_jobs=None,
+                            executor=None,
+                            batch_size=None,
+                            streaming=False):
     """Bootstrap perfect-model ensemble simulations with replacement.
 
     Reference:
@@ -118,6 +754,29 @@ def bootstrap_perfect_model(ds,
         compute_persistence_skill (bool): Defaults to True.
         nlags (type): number of lags persistence forecast skill.
                       Defaults to ds.time.size.
+        seed (int): seed for the random draws. Every iteration gets its own
+                    seed derived from it, so results are identical for any
+                    number of workers. Defaults to None (seeds are drawn
+                    from the global numpy random state).
+        n_jobs (int): number of processes to distribute the iterations
+                      over. -1 uses all cores, -2 all but one and so on.
+                      Defaults to None (serial).
+        executor (object): executor with a concurrent.futures-like `map`
+                           method to run the iterations on instead, e.g. a
+                           ThreadPoolExecutor or `client.get_executor()` of
+                           a dask distributed client. Defaults to None.
+        batch_size (int): number of iterations to stack along a `bootstrap`
+                          dimension and evaluate at once. Larger batches are
+                          faster but need batch_size times the memory of
+                          ds. Draws are the same as without batching.
+                          Defaults to None (one iteration at a time).
+        streaming (bool): reduce every iteration to confidence levels and
+                          p values as it arrives instead of keeping all
+                          of them. Peak memory then does not depend on
+                          bootstrap. Confidence levels are estimated with
+                          the P-square algorithm, p values are exact.
+                          dask-backed input is computed iteration by
+                          iteration. Defaults to False.
 
     Returns:
         init_ci (xr.Dataset): confidence levels of init_skill
@@ -160,89 +819,75 @@ def bootstrap_perfect_model(ds,
     ci_low_pers = p_pers / 2
     ci_high_pers = 1 - p_pers / 2
 
-    inits = ds.initialization.values
-    init = []
-    uninit = []
-    pers = []
+    # one seed per iteration, drawn up front in the calling process
+    if seed is None:
+        seeds = np.random.randint(np.iinfo(np.int32).max, size=bootstrap)
+    else:
+        seeds = np.random.RandomState(seed).randint(np.iinfo(np.int32).max,
+                                                    size=bootstrap)
+    if batch_size is None:
+        func = _bootstrap_perfect_model_iteration
+    else:
+        func = _bootstrap_perfect_model_batch
+        seeds = [seeds[i:i + batch_size]
+                 for i in range(0, bootstrap, batch_size)]
+    # persistence only depends on which initializations are drawn
+    pers_statistics = None
+    if compute_persistence_skill:
+        pers_statistics = _persistence_pm_statistics(ds, control, nlags,
+                                                     metric=metric)
+    # the variance normalizing e.g. nrmse does not depend on the draws
+    control_variance = None
+    if _get_metric(metric).requires_control:
+        control_variance = _get_variance(control,
+                                         reference_period=reference_period,
+                                         time_length=running)
+    iteration = partial(
+        func, ds=ds, control=control, metric=metric, comparison=comparison,
+        compute_uninitialized_skill=compute_uninitialized_skill,
+        pers_statistics=pers_statistics, running=running,
+        reference_period=reference_period, control_variance=control_variance)
     # resample with replacement
-    # DoTo: parallelize loop
-    for _ in range(bootstrap):
-        smp = np.random.choice(inits, len(inits))
-        smp_ds = ds.sel(initialization=smp)
-        # compute init skill
-        init.append(
-            compute_perfect_model(
-                smp_ds,
-                control,
-                metric=metric,
-                comparison=comparison,
-                running=running,
-                reference_period=reference_period))
+    results = _executor_imap(iteration, seeds, n_jobs=n_jobs,
+                             executor=executor)
+    if streaming:
+        (init_ci, uninit_ci, pers_ci, p_uninit_over_init,
+         p_pers_over_init) = _stream_bootstrap_results(
+             results, [ci_low, ci_high], [ci_low_pers, ci_high_pers],
+             metric, compute_ci)
+    else:
+        init, uninit, pers = zip(*results)
+        init = xr.concat(init, dim='bootstrap')
         if compute_uninitialized_skill:
-            # generate uninitialized ensemble from control
-            uninit_ds = _pseudo_ens(ds, control).isel(time=0)
-            # compute uninit skill
-            uninit.append(
-                compute_perfect_model(
-                    uninit_ds,
-                    control,
-                    metric=metric,
-                    comparison=comparison,
-                    running=running,
-                    reference_period=reference_period))
-        # compute persistence skill
+            uninit = xr.concat(uninit, dim='bootstrap')
         if compute_persistence_skill:
-            pers.append(
-                compute_persistence_pm(
-                    smp_ds, control, nlags=nlags, dim='time', metric=metric))
-    init = xr.concat(init, dim='bootstrap')
-    if compute_uninitialized_skill:
-        uninit = xr.concat(uninit, dim='bootstrap')
-    if compute_persistence_skill:
-        pers = xr.concat(pers, dim='bootstrap')
-
-    def _distribution_to_ci(ds, ci_low, ci_high, dim='bootstrap'):
-        try:
-            if len(ds.chunks) >= 1:
-                ds = ds.compute()
-        except:
-            pass
-        ds_ci = ds.quantile(q=[ci_low, ci_high], dim=dim)
-        return ds_ci
-
-    if compute_ci:
-        init_ci = _distribution_to_ci(init, ci_low, ci_high)
-        result = _merge_result(result, init_ci, 'init_ci')
+            pers = xr.concat(pers, dim='bootstrap')
+
+        init_ci, uninit_ci, pers_ci = None, None, None
+        if compute_ci:
+            init_ci = _distribution_to_ci(init, ci_low, ci_high)
+            if compute_uninitialized_skill:
+                uninit_ci = _distribution_to_ci(uninit, ci_low, ci_high)
+            if compute_persistence_skill:
+                pers_ci = _distribution_to_ci(pers, ci_low_pers,
+                                              ci_high_pers)
+        p_uninit_over_init, p_pers_over_init = None, None
         if compute_uninitialized_skill:
-            uninit_ci = _distribution_to_ci(uninit, ci_low, ci_high)
-            result = _merge_result(result, uninit_ci, 'uninit_ci')
+            p_uninit_over_init = _pvalue_from_distributions(uninit, init,
+                                                            metric=metric)
         if compute_persistence_skill:
-            pers_ci = _distribution_to_ci(pers, ci_low_pers, ci_high_pers)
-            result = _merge_result(result, pers_ci, 'pers_ci')
-    else:
-        init_ci = None
-        pers_ci = None
-        uninit_ci = None
-
-    def _pvalue_from_distributions(simple_fct, init, metric=metric):
-        """Get probability that skill of simple_fct is larger than
-        init skill."""
-        pv = ((simple_fct - init) > 0).sum('bootstrap') / init.bootstrap.size
-        if metric not in ['pearson_r', 'ppp']:  # positively oriented metrics
-            pv = 1 - pv
-        return pv
+            p_pers_over_init = _pvalue_from_distributions(pers, init,
+                                                          metric=metric)
 
-    if compute_uninitialized_skill:
-        p_uninit_over_init = _pvalue_from_distributions(uninit, init)
+    if init_ci is not None:
+        result = _merge_result(result, init_ci, 'init_ci')
+    if uninit_ci is not None:
+        result = _merge_result(result, uninit_ci, 'uninit_ci')
+    if pers_ci is not None:
+        result = _merge_result(result, pers_ci, 'pers_ci')
+    if p_uninit_over_init is not None:
         result = _merge_result(result, p_uninit_over_init,
                                'p_uninit_over_init')
-    else:
-        p_uninit_over_init, uninit_ci = None, None
-
-    if compute_persistence_skill:
-        p_pers_over_init = _pvalue_from_distributions(pers, init)
-        result = _merge_result(result, p_pers_over_init,
-                               'p_pers_over_init')
-    else:
-        p_pers_over_init, pers_ci = None, None
+    if p_pers_over_init is not None:
+        result = _merge_result(result, p_pers_over_init, 'p_pers_over_init')
     return result
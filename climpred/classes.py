@@ -1,7 +1,7 @@
 import xarray as xr
 from .prediction import (compute_reference, compute_persistence,
                          compute_perfect_model, compute_persistence_pm,
-                         compute_uninitialized)
+                         compute_uninitialized, _get_variance)
 from .bootstrap import bootstrap_perfect_model, _pseudo_ens
 # Both:
 # TODO: add horizon functionality
@@ -206,11 +206,16 @@ class PerfectModelEnsemble(PredictionEnsemble):
 
         super().__init__(xobj)
         self.control = {}
+        self._control_variance = None
 
     def add_control(self, xobj):
         """Add the control run that initialized the climate prediction
         ensemble.
 
+        The variance of the control used to normalize perfect-model skill
+        scores without smoothing is computed here once and reused by
+        compute_metric and compute_uninitialized.
+
         Args:
             xobj (xarray object): Dataset/DataArray of the control run.
         """
@@ -221,6 +226,7 @@ class PerfectModelEnsemble(PredictionEnsemble):
         _check_control_dimensions(self.initialized, xobj)
         _check_reference_vars_match_initialized(self.initialized, xobj)
         self.control = xobj
+        self._control_variance = _get_variance(self.control)
 
     def generate_uninitialized(self, var=None):
         """Generate an uninitialized ensemble by bootstrapping the
@@ -246,8 +252,9 @@ class PerfectModelEnsemble(PredictionEnsemble):
         """Compares the initialized ensemble to the control run.
 
         Args:
-            metric (str, default 'pearson_r'):
-              Metric to apply in the comparison.
+            metric (str or list of str, default 'pearson_r'):
+              Metric to apply in the comparison. A list of metrics is
+              evaluated in one pass and stacked along dimension `metric`.
             comparison (str, default 'm2m'):
               How to compare the climate prediction ensemble to the control.
             running (int, default None):
@@ -263,20 +270,25 @@ class PerfectModelEnsemble(PredictionEnsemble):
             raise ValueError("""You need to add a control dataset before
             attempting to compute predictability.""")
         else:
+            control_variance = None
+            if running is None:
+                control_variance = self._control_variance
             return compute_perfect_model(self.initialized,
                                          self.control,
                                          metric=metric,
                                          comparison=comparison,
                                          running=running,
-                                         reference_period=reference_period)
+                                         reference_period=reference_period,
+                                         control_variance=control_variance)
 
     def compute_uninitialized(self, metric='pearson_r', comparison='m2m',
                               running=None, reference_period=None):
         """Compares the bootstrapped uninitialized run to the control run.
 
         Args:
-            metric (str, default 'pearson_r'):
-              Metric to apply in the comparison.
+            metric (str or list of str, default 'pearson_r'):
+              Metric to apply in the comparison. A list of metrics is
+              evaluated in one pass and stacked along dimension `metric`.
             comparison (str, default 'm2m'):
               How to compare to the control run.
             running (int, default None):
@@ -291,12 +303,16 @@ class PerfectModelEnsemble(PredictionEnsemble):
             raise ValueError("""Uninitialized ensemble not generated. Please
                              run `pm.generate_ensemble()` first.""")
         else:
+            control_variance = None
+            if running is None:
+                control_variance = self._control_variance
             return compute_perfect_model(self.uninitialized,
                                          self.control,
                                          metric=metric,
                                          comparison=comparison,
                                          running=running,
-                                         reference_period=reference_period)
+                                         reference_period=reference_period,
+                                         control_variance=control_variance)
 
     def compute_persistence(self, nlags=None, metric='pearson_r'):
         """Compute a simple persistence forecast for the control run.
@@ -0,0 +1,92 @@
+"""Compiled kernels of the skill metrics over a core dimension.
+
+The kernels are numba generalized ufuncs with signature ``(n),(n)->()``
+reducing the last axis of two arrays in a single pass without temporary
+arrays. They are only available if numba is installed, otherwise
+``_KERNELS`` is empty and the metrics fall back to xskillscore.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+_SIGNATURES = ['void(float32[:], float32[:], float32[:])',
+               'void(float64[:], float64[:], float64[:])']
+
+
+def _mse_kernel(a, b, out):
+    """Mean squared error of a and b."""
+    n = a.shape[0]
+    s = 0.
+    for i in range(n):
+        d = a[i] - b[i]
+        s += d * d
+    out[0] = s / n if n > 0 else np.nan
+
+
+def _rmse_kernel(a, b, out):
+    """Root mean squared error of a and b."""
+    n = a.shape[0]
+    s = 0.
+    for i in range(n):
+        d = a[i] - b[i]
+        s += d * d
+    out[0] = np.sqrt(s / n) if n > 0 else np.nan
+
+
+def _mae_kernel(a, b, out):
+    """Mean absolute error of a and b."""
+    n = a.shape[0]
+    s = 0.
+    for i in range(n):
+        s += abs(a[i] - b[i])
+    out[0] = s / n if n > 0 else np.nan
+
+
+def _pearson_r_kernel(a, b, out):
+    """Pearson correlation coefficient of a and b from their anomalies,
+    clipped to [-1, 1] like xskillscore."""
+    n = a.shape[0]
+    ma = 0.
+    mb = 0.
+    for i in range(n):
+        ma += a[i]
+        mb += b[i]
+    if n == 0:
+        out[0] = np.nan
+        return
+    ma /= n
+    mb /= n
+    sab = 0.
+    saa = 0.
+    sbb = 0.
+    for i in range(n):
+        da = a[i] - ma
+        db = b[i] - mb
+        sab += da * db
+        saa += da * da
+        sbb += db * db
+    den = np.sqrt(saa * sbb)
+    if den == 0:
+        out[0] = np.nan
+        return
+    r = sab / den
+    # comparisons keep NaN
+    if r > 1:
+        r = 1.
+    elif r < -1:
+        r = -1.
+    out[0] = r
+
+
+# compiled kernels by metric name, see prediction._Metric
+_KERNELS = {}
+if numba is not None:
+    for _name, _kernel in [('mse', _mse_kernel), ('rmse', _rmse_kernel),
+                           ('mae', _mae_kernel),
+                           ('pearson_r', _pearson_r_kernel)]:
+        _KERNELS[_name] = numba.guvectorize(_SIGNATURES, '(n),(n)->()',
+                                            nopython=True)(_kernel)
+    del _name, _kernel
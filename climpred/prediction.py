@@ -1,42 +1,103 @@
 """Objects dealing with decadal prediction metrics."""
 import types
-import warnings
+from collections import OrderedDict
+from functools import partial
 
 import cftime
 import dask
 import numpy as np
+import pandas as pd
 import xarray as xr
 
 from xskillscore import mae as _mae
 from xskillscore import mse as _mse
 from xskillscore import pearson_r as _pearson_r
-from xskillscore import pearson_r_p_value
 from xskillscore import rmse as _rmse
 
-from .stats import _check_xarray, _get_dims, z_significance
+from .kernels import _KERNELS
+from .stats import (_check_xarray, _get_dims, _np_t_test_p_value,
+                    _xr_pearson_r_p_value, z_significance)
 
 
 # -------------------------------------------- #
 # HELPER FUNCTIONS
 # Should only be used internally by esmtools
 # -------------------------------------------- #
-def _shift(a, b, lag, dim='time'):
+def _np_lead_skill(forecast, reference, nlags, reduce, return_p=False):
+    """Skill of every lead from contiguous slices of initializations.
+
+    Lead ``i`` of the forecast initialized at position ``j`` is compared to
+    the reference at position ``j + i``. Both arrays are viewed with
+    initialization first again, so every lead reduces the leading axis of
+    the slices ``forecast[:N - i, i]`` and ``reference[i:]`` without
+    copying them.
+
+    Args:
+        forecast (ndarray): forecast with trailing axes (lead,
+                            initialization).
+        reference (ndarray): reference with trailing axis initialization.
+        nlags (int): number of leads.
+        reduce (function): metric reducing the first axis of two arrays,
+                           see _Metric.
+        return_p (bool): If True, also return the two-sided p value of
+                         pearson r based on the number of pairs per lead.
+
+    Returns:
+        skill (ndarray): skill with trailing axis lead.
+        p (ndarray): If `return_p`, p values with trailing axis lead.
     """
-    Helper function to return two shifted time series for applying statistics
-    to lags. This shifts them, and then forces them to have a common dimension
-    so as not to break the metric functions.
+    forecast = np.moveaxis(forecast, [-1, -2], [0, 1])
+    reference = np.moveaxis(reference, -1, 0)
+    N = reference.shape[0]
+    shape = np.broadcast_shapes(forecast.shape[2:], reference.shape[1:])
+    skill = np.full((nlags,) + shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(min(nlags, N)):
+            skill[i] = reduce(forecast[:N - i, i], reference[i:])
+    skill = np.moveaxis(skill, 0, -1)
+    if return_p:
+        n = N - np.arange(nlags)
+        return skill, _np_t_test_p_value(skill, n)
+    return skill
+
+
+def _lead_skill(forecast, reference, metric, nlags, dim='initialization',
+                return_p=False):
+    """Apply a metric to every lead of the forecast against the reference
+    shifted by the lead, see _np_lead_skill.
+
+    Args:
+        forecast (xarray object): forecast with dimensions `time` (lead) and
+                                  `dim`.
+        reference (xarray object): reference with dimension `dim`.
+        metric (_Metric): metric with a `reduce` kernel.
+        nlags (int): number of leads.
+        dim (str): dimension to shift along. Default: 'initialization'
+        return_p (bool): If True, also return p values of pearson r.
 
-    This function is usually applied in a loop. So, one loops over (1, nlags)
-    applying the shift, then the metric, then concatenates all results into
-    one xarray object.
+    Returns:
+        skill (xarray object): skill with dimension `time`.
+        p (xarray object): If `return_p`, p values of pearson r.
     """
-    if a[dim].size != b[dim].size:
+    if forecast[dim].size != reference[dim].size:
         raise IOError("Please provide time series of equal lengths.")
-    N = a[dim].size
-    a = a.isel({dim: slice(0, N - lag)})
-    b = b.isel({dim: slice(0 + lag, N)})
-    b[dim] = a[dim]
-    return a, b
+    forecast = forecast.isel(time=slice(0, nlags))
+    # pair by position, not by label
+    if dim in forecast.coords:
+        forecast = forecast.drop(dim)
+    if dim in reference.coords:
+        reference = reference.drop(dim)
+    forecast, reference = xr.broadcast(forecast, reference,
+                                       exclude=['time', dim])
+    nout = 2 if return_p else 1
+    return xr.apply_ufunc(_np_lead_skill, forecast, reference,
+                          kwargs={'nlags': forecast.time.size,
+                                  'reduce': metric.reduce,
+                                  'return_p': return_p},
+                          input_core_dims=[['time', dim], [dim]],
+                          output_core_dims=[['time']] * nout,
+                          dask='parallelized',
+                          output_dtypes=[float] * nout)
 
 
 def _control_for_reference_period(control, reference_period='MK',
@@ -87,9 +148,7 @@ def _get_variance(control, reference_period=None, time_length=None):
     if reference_period is not None and isinstance(time_length, int):
         control = _control_for_reference_period(
             control, reference_period=reference_period, obs_years=time_length)
-        return control.var('time')
-    else:
-        return control.var('time')
+    return control.var('time')
 
 
 def _get_norm_factor(comparison):
@@ -100,7 +159,7 @@ def _get_norm_factor(comparison):
     is divided by 2 to get control variance.
 
     Args:
-        comparison (function): comparison function.
+        comparison (str or function): comparison name or function.
 
     Returns:
         fac (int): normalization factor.
@@ -109,15 +168,112 @@ def _get_norm_factor(comparison):
         ValueError: if comparison is not matching.
 
     """
-    comparison_name = comparison.__name__
-    if comparison_name in ['_m2e', '_e2c']:
-        fac = 1
-        return fac
-    elif comparison_name in ['_m2c', '_m2m']:
-        fac = 2
-        return fac
-    else:
+    fac = _get_comparison(comparison).norm_factor
+    if fac is None:
         raise ValueError('specify comparison to get normalization factor.')
+    return fac
+
+
+def _get_control_init_index(ds, control, init_month_index=0):
+    """Get the positions of the initializations of ds along the control time
+    axis.
+
+    Initialization years are looked up with a hash-based index instead of
+    selecting the control year by year.
+
+    Args:
+        ds (xarray object): ensemble with dimension initialization holding
+                            years.
+        control (xarray object): control with time axis of
+                                 xr.cftime_range, pd.date_range or np.int64.
+        init_month_index (int): time step within the initialization year
+                                for sub-annual controls. Default: 0
+
+    Returns:
+        inits_index (np.ndarray): integer positions along control time.
+
+    Raises:
+        ValueError: if the time axis is of unsupported type.
+        KeyError: if an initialization year is not found in control.
+    """
+    init_years = np.asarray(ds['initialization'].values)
+    time_index = control.indexes['time']
+    if isinstance(ds.time.values[0], cftime._cftime.DatetimeProlepticGregorian) or isinstance(ds.time.values[0], np.datetime64):
+        # first time step of every year and the number of steps per year
+        years, first, counts = np.unique(np.asarray(time_index.year),
+                                         return_index=True,
+                                         return_counts=True)
+        position = pd.Index(years).get_indexer(init_years)
+        if (position == -1).any():
+            raise KeyError('initializations not found in control',
+                           init_years[position == -1])
+        if (init_month_index >= counts[position]).any():
+            raise IndexError('init_month_index out of range for a year in '
+                             'control')
+        inits_index = first[position] + init_month_index
+    elif isinstance(ds.time.values[0], np.int64):
+        inits_index = time_index.get_indexer(init_years)
+        if (inits_index == -1).any():
+            raise KeyError('initializations not found in control',
+                           init_years[inits_index == -1])
+    else:
+        raise ValueError(
+            'Set time axis to xr.cftime_range, pd.date_range or np.int64.')
+    return inits_index
+
+
+def _persistence_pm_from_index(control, inits_index, nlags, metric,
+                               dim='time'):
+    """Persistence skill of the control run started at given positions.
+
+    Args:
+        control (xarray object): control simulation.
+        inits_index (np.ndarray or xr.DataArray): positions of the
+            initializations along dim, see _get_control_init_index. A
+            DataArray with dims (..., dim) evaluates several sets of
+            initializations, e.g. along a `bootstrap` dimension, at once.
+        nlags (int): number of lags.
+        metric (str): metric name, see compute_persistence_pm.
+        dim (str): time dimension of control. Default: 'time'
+
+    Returns:
+        pers (xarray object): persistence skill with lags in dimension time.
+    """
+    metric = _get_metric(metric)
+    if metric.requires_control:
+        raise ValueError('Please select between the following metrics: '
+                         + _metric_names(lambda m: not m.requires_control))
+    ref, fct = _gather_persistence_pm(control, inits_index, nlags, dim=dim)
+    pers = _apply_metric(metric, ref, fct, dim)
+    pers = pers.rename({'lag': 'time'})
+    pers['time'] = np.arange(1, 1 + nlags)
+    return pers.transpose('time', *[d for d in pers.dims if d != 'time'])
+
+
+def _gather_persistence_pm(control, inits_index, nlags, dim='time'):
+    """Gather the persistence forecast and all lagged references at once.
+
+    Args:
+        control (xarray object): control simulation.
+        inits_index (np.ndarray or xr.DataArray): positions of the
+            initializations along dim, see _persistence_pm_from_index.
+        nlags (int): number of lags.
+        dim (str): time dimension of control. Default: 'time'
+
+    Returns:
+        ref (xarray object): control at the lagged positions with additional
+                             dimension lag.
+        fct (xarray object): control at the initializations.
+    """
+    if not isinstance(inits_index, xr.DataArray):
+        inits_index = xr.DataArray(inits_index, dims=[dim])
+    control = control.isel({dim: slice(0, -nlags)})
+    if dim in control.coords:
+        control = control.drop(dim)
+    lag = np.arange(1, 1 + nlags)
+    fct = control.isel({dim: inits_index})
+    ref = control.isel({dim: inits_index + xr.DataArray(lag, dims='lag')})
+    return ref, fct
 
 
 def _drop_ensembles(ds, rmd_ensemble=[0]):
@@ -230,28 +386,7 @@ def _get_comparison_function(comparison):
         comparison (function): comparison function.
 
     """
-    if comparison == 'm2m':
-        comparison = '_m2m'
-    elif comparison == 'm2c':
-        comparison = '_m2c'
-    elif comparison == 'm2e':
-        comparison = '_m2e'
-    elif comparison == 'e2c':
-        comparison = '_e2c'
-    elif comparison == 'e2r':
-        comparison = '_e2r'
-    elif comparison == 'm2r':
-        comparison = '_m2r'
-    else:
-        raise ValueError("""Please supply a comparison from the following list:
-            'm2m'
-            'm2c'
-            'm2e'
-            'e2c'
-            'e2r'
-            'm2r'
-            """)
-    return eval(comparison)
+    return _get_comparison(comparison).function
 
 
 def _m2m(ds, supervector_dim='svd'):
@@ -268,22 +403,109 @@ def _m2m(ds, supervector_dim='svd'):
         reference (xarray object): reference.
 
     """
-    reference_list = []
-    forecast_list = []
-    for m in ds.member.values:
-        # drop the member being reference
-        ds_reduced = _drop_members(ds, rmd_member=[m])
-        reference = ds.sel(member=m)
-        for m2 in ds_reduced.member:
-            for i in ds.initialization:
-                reference_list.append(reference.sel(initialization=i))
-                forecast_list.append(
-                    ds_reduced.sel(member=m2, initialization=i))
-    reference = xr.concat(reference_list, supervector_dim)
-    forecast = xr.concat(forecast_list, supervector_dim)
+    # all ordered pairs of distinct members, reference member varying slowest
+    nmember = ds.member.size
+    reference_index, forecast_index = np.nonzero(
+        ~np.eye(nmember, dtype=bool))
+    # gather both sides in one vectorized isel along a new `pair` dimension
+    reference = ds.isel(member=xr.DataArray(reference_index, dims='pair'))
+    forecast = ds.isel(member=xr.DataArray(forecast_index, dims='pair'))
+    if 'member' in reference.coords:
+        reference = reference.drop('member')
+        forecast = forecast.drop('member')
+    stacked_dims = ('pair', 'initialization')
+    forecast = _stack_to_supervector(forecast, new_dim=supervector_dim,
+                                     stacked_dims=stacked_dims)
+    reference = _stack_to_supervector(reference, new_dim=supervector_dim,
+                                      stacked_dims=stacked_dims)
     return forecast, reference
 
 
+def _m2m_mse(ds):
+    """
+    Mean squared error of all members against all other members without
+    building the m2m supervectors.
+
+    Summed over all ordered pairs of distinct members, the squared
+    differences equal ``2 * M * sum((x - x.mean('member'))**2)``, so the m2m
+    mse is twice the unbiased member variance averaged over initializations.
+
+    Args:
+        ds (xarray object): xr.Dataset/xr.DataArray with member and
+                            initialization dimension.
+
+    Returns:
+        mse (xarray object): identical to ``_mse(*_m2m(ds), dim='svd')``.
+    """
+    return 2 * ds.var('member', ddof=1, skipna=False).mean('initialization',
+                                                           skipna=False)
+
+
+def _m2m_rmse(ds):
+    """
+    Root mean squared error of all members against all other members without
+    building the m2m supervectors. See _m2m_mse.
+    """
+    return np.sqrt(_m2m_mse(ds))
+
+
+def _m2m_mae(ds):
+    """
+    Mean absolute error of all members against all other members without
+    building the m2m supervectors.
+
+    With the members sorted, the sum of absolute differences over all pairs
+    is a weighted sum of the order statistics, ``sum_k (2k - M + 1) x_(k)``.
+
+    Args:
+        ds (xarray object): xr.Dataset/xr.DataArray with member and
+                            initialization dimension.
+
+    Returns:
+        mae (xarray object): identical to ``_mae(*_m2m(ds), dim='svd')``.
+    """
+    nmember = ds.member.size
+    ranked = xr.apply_ufunc(np.sort, ds,
+                            input_core_dims=[['member']],
+                            output_core_dims=[['rank']],
+                            dask='parallelized',
+                            output_dtypes=[float],
+                            output_sizes={'rank': nmember})
+    weights = xr.DataArray(2 * np.arange(nmember) - nmember + 1, dims='rank')
+    # each unordered pair appears twice in the supervector
+    pair_sum = 2 * (ranked * weights).sum('rank', skipna=False)
+    return (pair_sum / (nmember * (nmember - 1))).mean('initialization',
+                                                       skipna=False)
+
+
+def _m2m_pearson_r(ds):
+    """
+    Pearson correlation of all members against all other members without
+    building the m2m supervectors.
+
+    Both supervectors contain every member M-1 times, so they share mean and
+    variance. The cross product over all pairs per initialization is
+    ``sum(x)**2 - sum(x**2)`` taken over members.
+
+    Args:
+        ds (xarray object): xr.Dataset/xr.DataArray with member and
+                            initialization dimension.
+
+    Returns:
+        r (xarray object): identical to ``_pearson_r(*_m2m(ds), dim='svd')``.
+    """
+    nmember = ds.member.size
+    n = nmember * (nmember - 1) * ds.initialization.size
+    # remove the overall mean first to avoid cancellation in the moments
+    anom = ds - ds.mean(['member', 'initialization'])
+    s1 = anom.sum('member', skipna=False)
+    s2 = (anom**2).sum('member', skipna=False)
+    mean = (nmember - 1) * s1.sum('initialization', skipna=False) / n
+    cross = (s1**2 - s2).sum('initialization', skipna=False) / n
+    square = (nmember - 1) * s2.sum('initialization', skipna=False) / n
+    return (cross - mean**2) / (square - mean**2)
+
+
 def _m2e(ds, supervector_dim='svd'):
     """
     Create two supervectors to compare all members to ensemble mean.
@@ -321,7 +543,7 @@ def _m2c(ds, supervector_dim='svd', control_member=[0]):
         reference (xarray object): reference.
 
     """
-    reference = ds.isel(member=control_member).squeeze()
+    reference = ds.isel(member=control_member).squeeze('member')
     # drop the member being reference
     ds_dropped = _drop_members(ds, rmd_member=ds.member.values[control_member])
     forecast, reference = xr.broadcast(ds_dropped, reference)
@@ -347,7 +569,7 @@ def _e2c(ds, supervector_dim='svd', control_member=[0]):
         forecast (xarray object): forecast.
         reference (xarray object): reference.
     """
-    reference = ds.isel(member=control_member).squeeze()
+    reference = ds.isel(member=control_member).squeeze('member')
     reference = reference.rename({'initialization': supervector_dim})
     # drop the member being reference
     ds = _drop_members(ds, rmd_member=[ds.member.values[control_member]])
@@ -449,41 +671,104 @@ def _get_metric_function(metric):
     # proper underscore function
     if type(metric) == types.FunctionType:
         return metric
-    else:
-        pearson = ['pr', 'pearsonr', 'pearson_r']
-        if metric.lower() in pearson:
-            metric = '_pearson_r'
-        elif metric.lower() == 'rmse':
-            metric = '_rmse'
-        elif metric.lower() == 'mae':
-            metric = '_mae'
-        elif metric.lower() == 'mse':
-            metric = '_mse'
-        elif metric.lower() == 'nrmse':
-            metric = '_nrmse'
-        elif metric.lower() in ['nev', 'nmse']:
-            metric = '_nmse'
-        elif metric.lower() in ['ppp', 'msss']:
-            metric = '_ppp'
-        elif metric.lower() == 'nmae':
-            metric = '_nmae'
-        elif metric.lower() == 'uacc':
-            metric = '_uacc'
-        else:
-            raise ValueError("""Please supply a metric from the following list:
-                'pearson_r'
-                'rmse'
-                'mae'
-                'mse'
-                'nrmse'
-                'nev'
-                'nmse'
-                'ppp'
-                'msss'
-                'nmae'
-                'uacc'
-                """)
-        return eval(metric)
+    return _get_metric(metric).function
+
+
+def _masked_error(a, b, mask, squared=True):
+    """Mean (squared) error along the last axis over positions where mask is
+    True."""
+    n = mask.sum(axis=-1)
+    diff = np.where(mask, a - b, 0.)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if squared:
+            return np.einsum('...i,...i->...', diff, diff) / n
+        return np.abs(diff).sum(axis=-1) / n
+
+
+def _masked_mse(a, b, mask, dim):
+    """Mean squared error over dim where mask is True."""
+    return xr.apply_ufunc(_masked_error, a, b, mask,
+                          input_core_dims=[[dim], [dim], [dim]],
+                          dask='parallelized',
+                          output_dtypes=[float])
+
+
+def _masked_rmse(a, b, mask, dim):
+    """Root mean squared error over dim where mask is True."""
+    return np.sqrt(_masked_mse(a, b, mask, dim))
+
+
+def _masked_mae(a, b, mask, dim):
+    """Mean absolute error over dim where mask is True."""
+    return xr.apply_ufunc(_masked_error, a, b, mask,
+                          kwargs={'squared': False},
+                          input_core_dims=[[dim], [dim], [dim]],
+                          dask='parallelized',
+                          output_dtypes=[float])
+
+
+def _masked_pearson_r(a, b, mask, dim):
+    """Pearson correlation over dim where mask is True."""
+    return _xr_pearson_r_p_value(a, b, dim, mask=mask, return_p=False)
+
+
+def _reduce_mse(a, b):
+    """Mean squared error along the first axis."""
+    d = a - b
+    d *= d
+    return d.mean(axis=0)
+
+
+def _reduce_rmse(a, b):
+    """Root mean squared error along the first axis."""
+    return np.sqrt(_reduce_mse(a, b))
+
+
+def _reduce_mae(a, b):
+    """Mean absolute error along the first axis."""
+    d = a - b
+    return np.abs(d, out=d).mean(axis=0)
+
+
+def _reduce_pearson_r(a, b):
+    """Pearson correlation along the first axis, clipped to [-1, 1]."""
+    a = a - a.mean(axis=0)
+    b = b - b.mean(axis=0)
+    # sums of products without temporaries of the size of a
+    r = np.einsum('i...,i...->...', a, b) / np.sqrt(
+        np.einsum('i...,i...->...', a, a) *
+        np.einsum('i...,i...->...', b, b))
+    return np.clip(r, -1., 1.)
+
+
+def _reduce_last_axis(a, b, func):
+    """Apply func reducing the last axis along the first axis instead."""
+    return func(np.moveaxis(a, 0, -1), np.moveaxis(b, 0, -1))
+
+
+def _masked_metric(a, b, metric, mask, dim='initialization'):
+    """Apply a distance or correlation metric over dim using only the
+    positions where mask is True.
+
+    Masked positions get zero weight, while missing values inside the mask
+    still propagate as they do in xskillscore. This allows evaluating the
+    metric for many leads of different length at once.
+
+    Args:
+        a, b (xarray object): xr.Dataset/xr.DataArray to compare.
+        metric (str or function): metric with a masked kernel, see _Metric.
+        mask (xr.DataArray): boolean mask broadcastable to a and b.
+        dim (str): dimension to reduce. Default: 'initialization'
+
+    Returns:
+        res (xarray object): metric reduced over dim.
+    """
+    metric = _get_metric(metric)
+    if metric.masked is None:
+        raise ValueError('Please input one of the following metrics: '
+                         + _metric_names(lambda m: m.masked is not None))
+    a, b = xr.broadcast(a, b, exclude=[dim])
+    return metric.masked(a, b, mask, dim)
 
 
 # TODO: Do we need wrappers or should we rather create wrappers for skill score
@@ -520,14 +805,8 @@ def _ppp(ds, control, comparison, running=None, reference_period=None):
         ppp_skill (xarray object): skill of PPP.
 
     """
-    supervector_dim = 'svd'
-    forecast, reference = comparison(ds, supervector_dim)
-    mse_skill = _mse(forecast, reference, dim=supervector_dim)
-    var = _get_variance(
-        control, time_length=running, reference_period=reference_period)
-    fac = _get_norm_factor(comparison)
-    ppp_skill = 1 - mse_skill / var / fac
-    return ppp_skill
+    return _perfect_model_skill(ds, control, [_ppp], comparison, running,
+                                reference_period)[0]
 
 
 def _nrmse(ds, control, comparison, running=None, reference_period=None):
@@ -562,14 +841,8 @@ def _nrmse(ds, control, comparison, running=None, reference_period=None):
         nrmse_skill (xarray object): skill of NRMSE.
 
     """
-    supervector_dim = 'svd'
-    forecast, reference = comparison(ds, supervector_dim)
-    rmse_skill = _rmse(forecast, reference, dim=supervector_dim)
-    var = _get_variance(
-        control, time_length=running, reference_period=reference_period)
-    fac = _get_norm_factor(comparison)
-    nrmse_skill = 1 - rmse_skill / np.sqrt(var) / np.sqrt(fac)
-    return nrmse_skill
+    return _perfect_model_skill(ds, control, [_nrmse], comparison, running,
+                                reference_period)[0]
 
 
 def _nmse(ds, control, comparison, running=None, reference_period=None):
@@ -597,14 +870,8 @@ def _nmse(ds, control, comparison, running=None, reference_period=None):
     Returns:
         nmse_skill (xarray object): skill of NMSE.
     """
-    supervector_dim = 'svd'
-    forecast, reference = comparison(ds, supervector_dim)
-    mse_skill = _mse(forecast, reference, dim=supervector_dim)
-    var = _get_variance(
-        control, time_length=running, reference_period=reference_period)
-    fac = _get_norm_factor(comparison)
-    nmse_skill = 1 - mse_skill / var / fac
-    return nmse_skill
+    return _perfect_model_skill(ds, control, [_nmse], comparison, running,
+                                reference_period)[0]
 
 
 def _nmae(ds, control, comparison, running=None, reference_period=None):
@@ -623,17 +890,11 @@ def _nmae(ds, control, comparison, running=None, reference_period=None):
 
       NOTE: NMSE = - 1 - NEV
     """
-    supervector_dim = 'svd'
-    fct, truth = comparison(ds, supervector_dim)
-    mse_skill = _mse(fct, truth, dim=supervector_dim)
-    var = _get_variance(
-        control, time_length=running, reference_period=reference_period)
-    fac = _get_norm_factor(comparison)
-    nmse_skill = 1 - mse_skill / var / fac
-    return nmse_skill
+    return _perfect_model_skill(ds, control, [_nmae], comparison, running,
+                                reference_period)[0]
 
 
-def _uacc(forecast, reference, control, running=None, reference_period=None):
+def _uacc(ds, control, comparison, running=None, reference_period=None):
     """
     Unbiased ACC (uACC) metric.
 
@@ -656,8 +917,384 @@ def _uacc(forecast, reference, control, running=None, reference_period=None):
     Returns:
         uacc_skill (xarray object): skill of uACC
     """
-    return np.sqrt(
-        _ppp(forecast, reference, control, running, reference_period))
+    return _perfect_model_skill(ds, control, [_uacc], comparison, running,
+                                reference_period)[0]
+
+
+def _perfect_model_skill(ds, control, metrics, comparison, running=None,
+                         reference_period=None, supervector_dim='svd',
+                         control_variance=None):
+    """Evaluate several metrics of one perfect-model comparison in a single
+    pass.
+
+    Every metric is evaluated at most once, following its capabilities in
+    the registry (see _Metric): metrics with a base, e.g. rmse and the
+    perfect-model only metrics, are derived from the skill of their base and
+    the control variance, which is computed at most once unless given.
+    Metrics with a
+    closed form for the comparison never build its supervectors, all other
+    metrics share one set of supervectors.
+
+    Args:
+        ds (xarray object): xr.Dataset/xr.DataArray with member and
+                            initialization dimension.
+        control (xarray object): xr.Dataset/xr.DataArray of control
+                                 simulation.
+        metrics (list): metric names or functions, see _get_metric.
+        comparison (str or function): comparison name or function.
+        running (int): smoothing of control. Default: None (no smoothing).
+        reference_period (str): see _control_for_reference_period.
+        supervector_dim (str): name of supervector dimension. Default: 'svd'
+        control_variance (xarray object): variance of control for running
+                                          and reference_period, see
+                                          _get_variance. Default: None
+                                          (computed from control).
+
+    Returns:
+        skill (list of xarray object): skill for every metric in metrics.
+    """
+    comparison = _get_comparison(comparison)
+    supervectors = []
+    control_variance = [] if control_variance is None else [control_variance]
+    skill = {}
+
+    def _var():
+        if not control_variance:
+            control_variance.append(_get_variance(
+                control, time_length=running,
+                reference_period=reference_period))
+        return control_variance[0]
+
+    def _skill(metric):
+        if metric.name in skill:
+            return skill[metric.name]
+        if metric.base is not None:
+            res = _skill(_get_metric(metric.base))
+            if metric.requires_control:
+                res = metric.derive(res, _var(), comparison.norm_factor)
+            else:
+                res = metric.derive(res)
+        elif metric.requires_control:
+            res = metric.function(ds, control, comparison.function, running,
+                                  reference_period)
+        elif comparison.name in metric.closed_form:
+            res = metric.closed_form[comparison.name](ds)
+        else:
+            if not supervectors:
+                supervectors.extend(comparison.function(ds,
+                                                        supervector_dim))
+            res = _apply_metric(metric, *supervectors, supervector_dim)
+        skill[metric.name] = res
+        return res
+
+    return [_skill(_get_metric(metric)) for metric in metrics]
+
+
+# --------------------------------------------#
+# REGISTRY
+# Metrics and comparisons with the capabilities
+# the compute functions dispatch on.
+# --------------------------------------------#
+class _Metric:
+    """Metric with the capabilities the compute functions dispatch on.
+
+    Args:
+        name (str): name of the metric.
+        function (function): metric function. Metrics comparing two fields
+            are called as ``function(a, b, dim=dim)``, metrics requiring the
+            control as ``function(ds, control, comparison, running,
+            reference_period)``.
+        positive (bool): whether larger values mean better skill.
+        aliases (list of str): further names of the metric.
+        requires_control (bool): whether the metric is normalized by the
+            variance of the control and therefore only defined for
+            perfect-model comparisons.
+        base (str): name of the metric this metric is derived from.
+        derive (function): derives the metric elementwise from the skill of
+            base, called as ``derive(skill, var, fac)`` with the control
+            variance and the comparison's normalization factor if
+            requires_control, otherwise as ``derive(skill)``.
+        masked (function): kernel ``masked(a, b, mask, dim)`` evaluating the
+            metric only over positions where mask is True, which evaluates
+            many leads of different length at once, see _masked_metric.
+        reduce (function): numpy function ``reduce(a, b)`` reducing the
+            first axis of two arrays, which evaluates every lead on its
+            contiguous slice of initializations, see _lead_skill.
+        closed_form (dict): kernels ``closed_form[comparison](ds)`` giving
+            the metric of a comparison without building its supervectors.
+        statistics (bool): whether the skill of any resample of
+            initializations can be assembled from per-initialization terms,
+            see bootstrap._persistence_pm_statistics.
+        kernel (function): generalized ufunc ``kernel(a, b)`` reducing the
+            last axis, used instead of function by _apply_metric, e.g. the
+            compiled kernels in climpred.kernels.
+    """
+
+    def __init__(self, name, function, positive, aliases=None,
+                 requires_control=False, base=None, derive=None, masked=None,
+                 reduce=None, closed_form=None, statistics=False,
+                 kernel=None):
+        self.name = name
+        self.function = function
+        self.positive = positive
+        self.aliases = [] if aliases is None else list(aliases)
+        self.requires_control = requires_control
+        self.base = base
+        self.derive = derive
+        self.masked = masked
+        self.reduce = reduce
+        self.closed_form = {} if closed_form is None else dict(closed_form)
+        self.statistics = statistics
+        self.kernel = kernel
+
+    def __repr__(self):
+        return '_Metric({!r})'.format(self.name)
+
+
+class _Comparison:
+    """Comparison of an ensemble to a verification.
+
+    Args:
+        name (str): name of the comparison.
+        function (function): comparison function returning forecast and
+            reference.
+        perfect_model (bool): whether the ensemble is verified against
+            its own members (m2m, m2e, m2c, e2c) instead of a reference.
+        norm_factor (int): factor normalizing the control variance in
+            perfect-model only metrics, see _get_norm_factor.
+    """
+
+    def __init__(self, name, function, perfect_model, norm_factor=None):
+        self.name = name
+        self.function = function
+        self.perfect_model = perfect_model
+        self.norm_factor = norm_factor
+
+    def __repr__(self):
+        return '_Comparison({!r})'.format(self.name)
+
+
+# registered metrics and comparisons by lower case name and alias
+_METRICS = OrderedDict()
+_COMPARISONS = OrderedDict()
+
+
+def _register_metric(metric):
+    """Add a _Metric to the registry under its name and aliases."""
+    for name in [metric.name] + metric.aliases:
+        _METRICS[name.lower()] = metric
+
+
+def _register_comparison(comparison):
+    """Add a _Comparison to the registry under its name."""
+    _COMPARISONS[comparison.name.lower()] = comparison
+
+
+def _get_metric(metric):
+    """Get the registered metric of a name, alias or metric function.
+
+    Metric functions that are not registered are wrapped into a metric of
+    two fields without further capabilities.
+
+    Raises:
+        ValueError: if metric name not registered.
+    """
+    if isinstance(metric, _Metric):
+        return metric
+    if callable(metric):
+        for m in _METRICS.values():
+            if m.function is metric:
+                return m
+        return _Metric(metric.__name__.lstrip('_'), metric, positive=False)
+    try:
+        return _METRICS[metric.lower()]
+    except KeyError:
+        raise ValueError('Please supply a metric from the following list: '
+                         + ', '.join(repr(k) for k in _METRICS))
+
+
+def _get_comparison(comparison):
+    """Get the registered comparison of a name or comparison function.
+
+    Raises:
+        ValueError: if comparison not registered.
+    """
+    if isinstance(comparison, _Comparison):
+        return comparison
+    for c in _COMPARISONS.values():
+        if comparison is c.function or comparison == c.name:
+            return c
+    raise ValueError('Please supply a comparison from the following list: '
+                     + ', '.join(repr(k) for k in _COMPARISONS))
+
+
+def _apply_metric(metric, a, b, dim):
+    """Apply a metric of two fields over dim, with its kernel if it has
+    one."""
+    metric = _get_metric(metric)
+    if metric.kernel is not None:
+        return _gufunc_metric(a, b, dim, metric.kernel)
+    return metric.function(a, b, dim=dim)
+
+
+def _metric_names(condition):
+    """Names of the registered metrics fulfilling condition."""
+    names = OrderedDict((m.name, None) for m in _METRICS.values()
+                        if condition(m))
+    return ', '.join(repr(name) for name in names)
+
+
+def _root(skill):
+    """Square root of skill, e.g. rmse from mse."""
+    return np.sqrt(skill)
+
+
+def _mse_skill_score(mse, var, fac):
+    """Mean squared error normalized by the control variance, see _ppp."""
+    return 1 - mse / var / fac
+
+
+def _rmse_skill_score(rmse, var, fac):
+    """Root mean squared error normalized by the control standard deviation,
+    see _nrmse."""
+    return 1 - rmse / np.sqrt(var) / np.sqrt(fac)
+
+
+def _uacc_from_ppp(ppp, var, fac):
+    """uACC from PPP, see _uacc."""
+    return np.sqrt(ppp)
+
+
+for _m in [
+        _Metric('pearson_r', _pearson_r, positive=True,
+                aliases=['pr', 'pearsonr'], masked=_masked_pearson_r,
+                reduce=_reduce_pearson_r,
+                closed_form={'m2m': _m2m_pearson_r}, statistics=True,
+                kernel=_KERNELS.get('pearson_r')),
+        _Metric('rmse', _rmse, positive=False, base='mse', derive=_root,
+                masked=_masked_rmse, reduce=_reduce_rmse,
+                closed_form={'m2m': _m2m_rmse},
+                statistics=True, kernel=_KERNELS.get('rmse')),
+        _Metric('mse', _mse, positive=False, masked=_masked_mse,
+                reduce=_reduce_mse,
+                closed_form={'m2m': _m2m_mse}, statistics=True,
+                kernel=_KERNELS.get('mse')),
+        _Metric('mae', _mae, positive=False, masked=_masked_mae,
+                reduce=_reduce_mae,
+                closed_form={'m2m': _m2m_mae}, statistics=True,
+                kernel=_KERNELS.get('mae')),
+        _Metric('nrmse', _nrmse, positive=True, requires_control=True,
+                base='rmse', derive=_rmse_skill_score),
+        _Metric('nmse', _nmse, positive=True, aliases=['nev'],
+                requires_control=True, base='mse', derive=_mse_skill_score),
+        _Metric('ppp', _ppp, positive=True, aliases=['msss'],
+                requires_control=True, base='mse', derive=_mse_skill_score),
+        _Metric('nmae', _nmae, positive=True, requires_control=True,
+                base='mse', derive=_mse_skill_score),
+        _Metric('uacc', _uacc, positive=True, requires_control=True,
+                base='ppp', derive=_uacc_from_ppp)]:
+    _register_metric(_m)
+
+for _c in [_Comparison('m2m', _m2m, perfect_model=True, norm_factor=2),
+           _Comparison('m2c', _m2c, perfect_model=True, norm_factor=2),
+           _Comparison('m2e', _m2e, perfect_model=True, norm_factor=1),
+           _Comparison('e2c', _e2c, perfect_model=True, norm_factor=1),
+           _Comparison('e2r', _e2r, perfect_model=False),
+           _Comparison('m2r', _m2r, perfect_model=False)]:
+    _register_comparison(_c)
+del _m, _c
+
+
+def _gufunc_metric(a, b, dim, func):
+    """Apply a metric reducing the last axis of two arrays over dim."""
+    # broadcast first for the same dimension order as xskillscore
+    a, b = xr.broadcast(a, b, exclude=[dim])
+    return xr.apply_ufunc(func, a, b,
+                          input_core_dims=[[dim], [dim]],
+                          dask='parallelized',
+                          output_dtypes=[float])
+
+
+def _masked_gufunc(a, b, mask, func):
+    """Apply func over the last axis only at positions where mask is True.
+
+    All positions sharing the same mask, e.g. all grid points of one lead,
+    are evaluated in one call of func.
+    """
+    a, b, mask = np.broadcast_arrays(a, b, mask)
+    n = a.shape[-1]
+    res = np.full(a.shape[:-1], np.nan)
+    flat_res = res.reshape(-1)
+    a, b = a.reshape(-1, n), b.reshape(-1, n)
+    patterns, inverse = np.unique(mask.reshape(-1, n), axis=0,
+                                  return_inverse=True)
+    for i, pattern in enumerate(patterns):
+        rows = inverse.ravel() == i
+        flat_res[rows] = func(a[rows][:, pattern], b[rows][:, pattern])
+    return res
+
+
+def _masked_gufunc_metric(a, b, mask, dim, func):
+    """Apply a metric reducing the last axis of two arrays over dim where
+    mask is True, see _masked_metric."""
+    return xr.apply_ufunc(_masked_gufunc, a, b, mask,
+                          kwargs={'func': func},
+                          input_core_dims=[[dim], [dim], [dim]],
+                          dask='parallelized',
+                          output_dtypes=[float])
+
+
+def register_metric(name, func, positive=False, aliases=None):
+    """Register a metric of a forecast and a verification for all compute
+    functions.
+
+    func only has to reduce the last axis of two numpy arrays of the same
+    shape to one value, like a generalized ufunc with signature
+    ``(n),(n)->()``, e.g. created with ``numba.guvectorize``. climpred
+    applies it over the core dimension of the xarray objects with
+    ``xr.apply_ufunc``, so registered metrics can be used in
+    ``compute_perfect_model``, ``compute_reference``,
+    ``compute_persistence``, ``compute_persistence_pm``,
+    ``compute_uninitialized`` and ``bootstrap_perfect_model``. All leads and
+    bootstrap iterations are evaluated at once and dask-backed inputs stay
+    lazy.
+
+    Registered metrics are only known in the process that registered them.
+    For ``bootstrap_perfect_model`` with ``n_jobs`` on platforms spawning
+    new processes, register them in an importable module.
+
+    Args:
+        name (str): name of the metric passed as `metric` argument.
+        func (function): metric reducing the last axis of two arrays.
+        positive (bool): whether larger values mean better skill. Used to
+                         orient bootstrapped p values. Default: False
+        aliases (list of str): further names of the metric. Default: None
+
+    Returns:
+        metric (function): metric function ``metric(a, b, dim)`` applying
+                           func to xarray objects.
+
+    Raises:
+        ValueError: if name or an alias is already registered.
+
+    Example:
+        >>> def weighted_mse(a, b):
+        ...     w = np.linspace(1, 2, a.shape[-1])
+        ...     return ((a - b)**2 * w).sum(-1) / w.sum()
+        >>> register_metric('weighted_mse', weighted_mse)
+        >>> compute_perfect_model(ds, control, metric='weighted_mse')
+    """
+    names = [name] + ([] if aliases is None else list(aliases))
+    registered = [n for n in names if n.lower() in _METRICS]
+    if registered:
+        raise ValueError('metrics {} already registered'.format(registered))
+    metric = _Metric(name, partial(_gufunc_metric, func=func), positive,
+                     aliases=aliases,
+                     masked=partial(_masked_gufunc_metric, func=func),
+                     reduce=partial(_reduce_last_axis, func=func),
+                     kernel=func)
+    _register_metric(metric)
+    return metric.function
 
 
 # --------------------------------------------#
@@ -671,7 +1308,8 @@ def compute_perfect_model(ds,
                           metric='pearson_r',
                           comparison='m2m',
                           running=None,
-                          reference_period=None):
+                          reference_period=None,
+                          control_variance=None):
     """
     Compute a predictability skill score for a perfect-model framework
     simulation dataset.
@@ -679,34 +1317,43 @@ def compute_perfect_model(ds,
     Args:
         ds (xarray object): ensemble with dimensions time and member.
         control (xarray object): control with dimensions time.
-        metric (str): metric name see _get_metric_function.
+        metric (str or list of str): metric name see _get_metric_function.
+                                     For a list of metrics, the comparison
+                                     and the statistics shared by the
+                                     metrics are computed only once.
         comparison (str): comparison name see _get_comparison_function.
         running (optional int): size of the running window for variance
                                 smoothing. Default: None (no smoothing)
         reference_period (optional str): choice of reference period of control.
                                 Default: None (corresponds to MK approach)
+        control_variance (optional xarray object): variance of control for
+                                running and reference_period as returned by
+                                _get_variance, to reuse across calls.
+                                Default: None (computed from control)
 
     Returns:
-        res (xarray object): skill score.
+        res (xarray object): skill score. For a list of metrics, skill
+                             scores are stacked along a new dimension
+                             `metric`.
 
     Raises:
         ValueError: if comarison not implemented.
                     if metric not implemented.
     """
     supervector_dim = 'svd'
-    comparison = _get_comparison_function(comparison)
-    if comparison not in [_m2m, _m2c, _m2e, _e2c]:
+    comparison = _get_comparison(comparison)
+    if not comparison.perfect_model:
         raise ValueError('specify comparison argument')
 
-    metric = _get_metric_function(metric)
-    if metric in [_pearson_r, _rmse, _mse, _mae]:
-        forecast, reference = comparison(ds, supervector_dim)
-        res = metric(forecast, reference, dim=supervector_dim)
-    # perfect-model only metrics
-    elif metric in [_nmae, _nrmse, _nmse, _ppp, _uacc]:
-        res = metric(ds, control, comparison, running, reference_period)
-    else:
-        raise ValueError('specify metric argument')
+    metrics = metric if isinstance(metric, (list, tuple)) else [metric]
+    metrics = [_get_metric(m) for m in metrics]
+    res = _perfect_model_skill(ds, control, metrics, comparison, running,
+                               reference_period, supervector_dim,
+                               control_variance)
+    if not isinstance(metric, (list, tuple)):
+        return res[0]
+    names = [m if isinstance(m, str) else _get_metric(m).name
+             for m in metric]
     # Note: Aaron implemented this in PR #87. They break when
     # compute_perfect_model is called from `bootstrap_perfect_model`. So need
     # to debug why that is the case and see if these lines are even
@@ -714,7 +1361,7 @@ def compute_perfect_model(ds,
 #    time_size = ds.time.size
 #    del res['time']
 #    res['time'] = np.arange(1, 1 + time_size)
-    return res
+    return xr.concat(res, pd.Index(names, name='metric'))
 
 
 def compute_reference(ds,
@@ -762,42 +1409,32 @@ def compute_reference(ds,
     """
     _check_xarray(ds)
     _check_xarray(reference)
-    comparison = _get_comparison_function(comparison)
-    if comparison not in [_e2r, _m2r]:
+    comparison = _get_comparison(comparison)
+    if comparison.perfect_model:
         raise ValueError("""Please input either 'e2r' or 'm2r' for your
             comparison.""")
-    forecast, reference = comparison(ds, reference)
-    if nlags is None:
-        nlags = forecast.time.size
-    metric = _get_metric_function(metric)
-    if metric not in [_pearson_r, _rmse, _mse, _mae]:
-        raise ValueError("""Please input 'pearson_r', 'rmse', 'mse', or
-            'mae' for your metric.""")
-    plag = []
-    for i in range(0, nlags):
-        a, b = _shift(
-            forecast.isel(time=i), reference, i, dim='initialization')
-        plag.append(metric(a, b, dim='initialization'))
-    skill = xr.concat(plag, 'time')
-    skill['time'] = np.arange(1, 1 + nlags)
-    if (return_p) & (metric != _pearson_r):
+    metric = _get_metric(metric)
+    if (return_p) & (metric.name != 'pearson_r'):
         raise ValueError("""You can only return p values if the metric is
             pearson_r.""")
-    elif (return_p) & (metric == _pearson_r):
-        # NaN values throw warning for p-value comparison, so just
-        # suppress that here.
-        p_value = []
-        for i in range(0, nlags):
-            a, b = _shift(
-                forecast.isel(time=i), reference, i, dim='initialization')
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                p_value.append(pearson_r_p_value(a, b, dim='initialization'))
-        p_value = xr.concat(p_value, 'time')
+    if metric.reduce is None:
+        raise ValueError('Please input one of the following metrics: '
+                         + _metric_names(lambda m: m.reduce is not None))
+    forecast, reference = comparison.function(ds, reference)
+    if nlags is None:
+        nlags = forecast.time.size
+    # every lead on its contiguous slice of initializations
+    res = _lead_skill(forecast, reference, metric, nlags,
+                      dim='initialization', return_p=return_p)
+    if return_p:
+        skill, p_value = res
+        skill['time'] = np.arange(1, 1 + nlags)
         p_value['time'] = np.arange(1, 1 + nlags)
-        return skill, p_value
+        return skill.transpose('time', ...), p_value.transpose('time', ...)
     else:
-        return skill
+        skill = res
+        skill['time'] = np.arange(1, 1 + nlags)
+        return skill.transpose('time', ...)
 
 
 def compute_persistence_pm(ds, control, nlags, metric='pearson_r',
@@ -838,47 +1475,9 @@ def compute_persistence_pm(ds, control, nlags, metric='pearson_r',
                               metric applied.
     """
     _check_xarray(control)
-    metric = _get_metric_function(metric)
-    if metric not in [_pearson_r, _rmse, _mse, _mae]:
-        raise ValueError("""Please select between the following metrics:
-            'pearson_r',
-            'rmse',
-            'mse',
-            'mae'""")
-
-    init_years = ds['initialization'].values
-    if isinstance(ds.time.values[0], cftime._cftime.DatetimeProlepticGregorian) or isinstance(ds.time.values[0], np.datetime64):
-        init_cftimes = []
-        for year in init_years:
-            init_cftimes.append(control.sel(
-                time=str(year)).isel(time=init_month_index).time)
-        init_cftimes = xr.concat(init_cftimes, 'time')
-    elif isinstance(ds.time.values[0], np.int64):
-        init_cftimes = []
-        for year in init_years:
-            init_cftimes.append(control.sel(
-                time=year).time)
-        init_cftimes = xr.concat(init_cftimes, 'time')
-    else:
-        raise ValueError(
-            'Set time axis to xr.cftime_range, pd.date_range or np.int64.')
-
-    inits_index = []
-    control_time_list = list(control.time.values)
-    for i, inits in enumerate(init_cftimes.time.values):
-        inits_index.append(control_time_list.index(init_cftimes[i]))
-
-    plag = []  # holds results of persistence for each lag
-    control = control.isel({dim: slice(0, -nlags)})
-    for lag in range(1, 1 + nlags):
-        inits_index_plus_lag = [x + lag for x in inits_index]
-        ref = control.isel({dim: inits_index_plus_lag})
-        fct = control.isel({dim: inits_index})
-        ref[dim] = fct[dim]
-        plag.append(metric(ref, fct, dim=dim))
-    pers = xr.concat(plag, 'time')
-    pers['time'] = np.arange(1, 1 + nlags)
-    return pers
+    inits_index = _get_control_init_index(ds, control, init_month_index)
+    return _persistence_pm_from_index(control, inits_index, nlags, metric,
+                                      dim=dim)
 
 
 def compute_persistence(ds, reference, nlags, metric='pearson_r',
@@ -917,33 +1516,36 @@ def compute_persistence(ds, reference, nlags, metric='pearson_r',
         pers (xarray object): Results of persistence forecast with the input
                               metric applied.
     """
-    def _intersection(lst1, lst2):
-        """
-        Custom intersection, since `set.intersection()` changes type of list.
-        """
-        lst3 = [value for value in lst1 if value in lst2]
-        return np.array(lst3)
-
     _check_xarray(reference)
-    metric = _get_metric_function(metric)
-    if metric not in [_pearson_r, _rmse, _mse, _mae]:
-        raise ValueError("""Please select between the following metrics:
-            'pearson_r',
-            'rmse',
-            'mse',
-            'mae'""")
-    plag = []  # holds results of persistence for each lag
-    for lag in range(1, 1 + nlags):
-        inits = ds['initialization'].values
-        ctrl_inits = reference.isel({dim: slice(0, -lag)})[dim].values
-        inits = _intersection(inits, ctrl_inits)
-        ref = reference.sel({dim: inits + lag})
-        fct = reference.sel({dim: inits})
-        ref[dim] = fct[dim]
-        plag.append(metric(ref, fct, dim=dim))
-    pers = xr.concat(plag, 'time')
-    pers['time'] = np.arange(1, 1 + nlags)
-    return pers
+    metric = _get_metric(metric)
+    if metric.masked is None:
+        raise ValueError('Please select between the following metrics: '
+                         + _metric_names(lambda m: m.masked is not None))
+    # map initializations and their lagged targets to positions in reference
+    # once via the hash-based index
+    reference_index = reference.indexes[dim]
+    N = reference[dim].size
+    inits = ds['initialization'].values
+    lag = np.arange(1, 1 + nlags)
+    inits_index = reference_index.get_indexer(inits)
+    lagged = inits[np.newaxis, :] + lag[:, np.newaxis]
+    lagged_index = reference_index.get_indexer(
+        lagged.ravel()).reshape(lagged.shape)
+    # only initializations within the first N - lag steps of the reference
+    mask = (inits_index >= 0) & (inits_index < N - lag[:, np.newaxis])
+    if (lagged_index[mask] == -1).any():
+        raise KeyError('lagged initializations not found in reference',
+                       np.unique(lagged[mask & (lagged_index == -1)]))
+    mask = xr.DataArray(mask, dims=['lag', dim])
+    if dim in reference.coords:
+        reference = reference.drop(dim)
+    fct = reference.isel({dim: np.maximum(inits_index, 0)})
+    ref = reference.isel({dim: xr.DataArray(np.maximum(lagged_index, 0),
+                                            dims=['lag', dim])})
+    pers = _masked_metric(ref, fct, metric, mask, dim=dim)
+    pers = pers.rename({'lag': 'time'})
+    pers['time'] = lag
+    return pers.transpose('time', *[d for d in pers.dims if d != 'time'])
 
 
 def compute_uninitialized(uninit, reference, metric='pearson_r',
@@ -982,22 +1584,20 @@ def compute_uninitialized(uninit, reference, metric='pearson_r',
     """
     _check_xarray(uninit)
     _check_xarray(reference)
-    comparison = _get_comparison_function(comparison)
-    if comparison not in [_e2r, _m2r]:
+    comparison = _get_comparison(comparison)
+    if comparison.perfect_model:
         raise KeyError("""Please input either 'e2r' or 'm2r' for your
             comparison. This will be implemented for the perfect model setup
             in the future.""")
-    uninit, reference = comparison(uninit, reference)
-    metric = _get_metric_function(metric)
-    u = metric(uninit, reference, dim=dim)
-    if (return_p) & (metric != _pearson_r):
+    uninit, reference = comparison.function(uninit, reference)
+    metric = _get_metric(metric)
+    if (return_p) & (metric.name != 'pearson_r'):
         raise KeyError("""You can only return p values if the metric is
             'pearson_r'.""")
-    elif (return_p) & (metric == _pearson_r):
-        p = pearson_r_p_value(uninit, reference, dim=dim)
-        return u, p
+    elif return_p:
+        return _xr_pearson_r_p_value(uninit, reference, dim)
     else:
-        return u
+        return _apply_metric(metric, uninit, reference, dim)
 
 
 # --------------------------------------------#
@@ -1054,7 +1654,6 @@ def xr_predictability_horizon(skill,
             limit keyword.""")
     ph = ph.where(~ph_not_reached, other=skill['time'].max())
     # mask out any initial NaNs (land, masked out regions, etc.)
-    mask = np.asarray(skill.isel({'time': 0}))
-    mask = np.isnan(mask)
-    ph = ph.where(~mask, np.nan)
+    mask = skill.isel({'time': 0}, drop=True).isnull()
+    ph = ph.where(~mask)
     return ph
@@ -1,9 +1,162 @@
+import os
 import warnings
+from collections import OrderedDict
+from functools import partial
 
+import dask.array
 import numpy as np
 import xarray as xr
 from eofs.xarray import Eof
 
+from .bootstrap import _executor_map
+from .utils import _content_key
+
+
+# EOF bases by content of the base field and weights, most recent last
+_EOF_CACHE = OrderedDict()
+_EOF_CACHE_SIZE = 4
+
+
+def _randomized_svd(a, k, n_oversamples=10, n_iter=4, seed=0):
+    """Leading k singular values and vectors of a by randomized subspace
+    iteration.
+
+    Reference:
+    * Halko, N., P. G. Martinsson, and J. A. Tropp. “Finding Structure with
+        Randomness: Probabilistic Algorithms for Constructing Approximate
+        Matrix Decompositions.” SIAM Review 53, no. 2 (2011): 217–88.
+        https://doi.org/10.1137/090771806.
+
+    Args:
+        a (np.ndarray): matrix to decompose.
+        k (int): number of singular values.
+        n_oversamples (int): additional random directions. Default: 10
+        n_iter (int): number of power iterations. Default: 4
+        seed (int): seed of the random test matrix. Default: 0
+
+    Returns:
+        u, s, vt (np.ndarray): truncated singular value decomposition.
+    """
+    rng = np.random.RandomState(seed)
+    p = min(k + n_oversamples, min(a.shape))
+    q = a @ rng.standard_normal((a.shape[1], p))
+    for _ in range(n_iter):
+        q = np.linalg.qr(q)[0]
+        q = a @ np.linalg.qr(a.T @ q)[0]
+    q = np.linalg.qr(q)[0]
+    u, s, vt = np.linalg.svd(q.T @ a, full_matrices=False)
+    return (q @ u)[:, :k], s[:k], vt[:k]
+
+
+def _truncated_eofs(base, neofs, weights=None):
+    """Leading EOFs of base from a randomized truncated SVD.
+
+    Same conventions as `eofs.xarray.Eof`: the weighted field is centered in
+    time, missing values have to be missing at all times and eigenvalues
+    are normalized by the number of time steps minus one. Dask-backed
+    fields are decomposed out-of-core with
+    `dask.array.linalg.svd_compressed`.
+
+    Args:
+        base (xr.DataArray): field with dimension time to calculate EOFs
+                             from.
+        neofs (int): number of EOFs.
+        weights (np.ndarray): EOF weights. Default: None
+
+    Returns:
+        basis (xr.Dataset): eofs (unscaled), eigenvalues and, if given,
+                            weights.
+    """
+    base = base.transpose('time', ...)
+    spatial_dims = list(base.dims[1:])
+    spatial_shape = base.shape[1:]
+    data = base.data
+    if weights is not None:
+        weights = np.broadcast_to(weights, spatial_shape)
+        data = data * weights
+    data = data.reshape(base.shape[0], -1)
+    data = data - data.mean(0)
+    if isinstance(data, dask.array.Array):
+        # zero the missing columns instead of dropping them, so the mask is
+        # found in the same pass over data as the SVD
+        valid = ~dask.array.isnan(data[0])
+        data = dask.array.where(valid, data, 0)
+        # svd_compressed needs a single chunk along one dimension
+        data = data.rechunk({0: -1, 1: 'auto'})
+        s, vt, valid = dask.array.compute(*dask.array.linalg.svd_compressed(
+            data, neofs, n_power_iter=4, seed=0)[1:], valid)
+        vt = vt[:, valid]
+    else:
+        valid = ~np.isnan(data[0])
+        _, s, vt = _randomized_svd(data[:, valid], neofs)
+    eofs = np.full((neofs, valid.size), np.nan)
+    eofs[:, valid] = vt
+    basis = xr.Dataset({
+        'eofs': (['mode'] + spatial_dims,
+                 eofs.reshape((neofs,) + spatial_shape)),
+        'eigenvalues': ('mode', s**2 / (base.shape[0] - 1))},
+        coords={d: base[d] for d in spatial_dims if d in base.coords})
+    basis['mode'] = np.arange(neofs)
+    if weights is not None:
+        basis['weights'] = (spatial_dims, weights)
+    return basis
+
+
+def _get_eofs(base, neofs, weights=None, eof_cache=None, svd='full'):
+    """EOF basis of base, computed once and cached.
+
+    Bases are kept in memory for the last _EOF_CACHE_SIZE base fields and
+    weights. A basis with more EOFs also serves requests for fewer.
+
+    Args:
+        base (xr.DataArray): field with dimension time to calculate EOFs
+                             from.
+        neofs (int): number of EOFs.
+        weights (np.ndarray): EOF weights, see `eofs.xarray.Eof`.
+                              Default: None
+        eof_cache (str): netCDF file to load the basis from if it was
+                         computed from the same base and weights, or to save
+                         it to otherwise. Default: None (memory only).
+        svd (str): 'full' for the full SVD of `eofs.xarray.Eof` or
+                   'randomized' for a truncated randomized SVD of only the
+                   leading neofs modes, see _truncated_eofs.
+                   Default: 'full'
+
+    Returns:
+        basis (xr.Dataset): eofs (unscaled), eigenvalues and, if given,
+                            weights.
+    """
+    if svd not in ['full', 'randomized']:
+        raise ValueError("svd must be 'full' or 'randomized', found %s"
+                         % svd)
+    key = _content_key(base, weights, svd)
+    basis = _EOF_CACHE.get(key)
+    if basis is None or basis.mode.size < neofs:
+        if eof_cache is not None and os.path.exists(eof_cache):
+            with xr.open_dataset(eof_cache) as stored:
+                if (stored.attrs.get('key') == key
+                        and stored.mode.size >= neofs):
+                    basis = stored.load()
+    if basis is None or basis.mode.size < neofs:
+        if svd == 'randomized':
+            basis = _truncated_eofs(base, neofs, weights=weights)
+        else:
+            solver = Eof(base, weights=weights)
+            basis = xr.Dataset({
+                'eofs': solver.eofs(neofs=neofs, eofscaling=0),
+                'eigenvalues': solver.eigenvalues(neigs=neofs)})
+            if weights is not None:
+                spatial_dims = [d for d in basis.eofs.dims if d != 'mode']
+                basis['weights'] = (spatial_dims, solver.getWeights())
+        basis.attrs['key'] = key
+        if eof_cache is not None:
+            basis.to_netcdf(eof_cache)
+    _EOF_CACHE[key] = basis
+    _EOF_CACHE.move_to_end(key)
+    while len(_EOF_CACHE) > _EOF_CACHE_SIZE:
+        _EOF_CACHE.popitem(last=False)
+    return basis.isel(mode=slice(0, neofs))
+
 
 def _relative_entropy_formula(sigma_b, sigma_x, mu_x, mu_b, neofs):
     """
@@ -18,64 +171,179 @@ def _relative_entropy_formula(sigma_b, sigma_x, mu_x, mu_b, neofs):
             (July 1, 2002): 2057–72. https://doi.org/10/fqwxpk.
 
     Args:
-        sigma_b (xr.DataArray): covariance matrix of baseline distribution
-        sigma_x (xr.DataArray): covariance matrix of forecast distribution
-        mu_b (xr.DataArray): mean state vector of the baseline distribution
-        mu_x (xr.DataArray): mean state vector of the forecast distribution
+        sigma_b (array-like): covariance matrices of baseline distribution
+                              with shape [..., neofs, neofs]
+        sigma_x (array-like): covariance matrices of forecast distribution
+                              with shape [..., neofs, neofs]
+        mu_b (array-like): mean state vectors of the baseline distribution
+                           with shape [..., neofs]
+        mu_x (array-like): mean state vectors of the forecast distribution
+                           with shape [..., neofs]
         neofs (int): number of EOFs used
 
     Returns:
-        R (float): relative entropy
-        dispersion (float): dispersion component
-        signal (float): signal component
+        R (np.ndarray): relative entropy with shape [...]
+        dispersion (np.ndarray): dispersion component with shape [...]
+        signal (np.ndarray): signal component with shape [...]
     """
+    sigma_b, sigma_x, mu_x, mu_b = (np.asarray(a, dtype=float) for a in
+                                    (sigma_b, sigma_x, mu_x, mu_b))
     fac = 0.5
-    dispersion = fac * (np.log(np.linalg.det(sigma_b) / np.linalg.det(sigma_x))
-                        + np.trace(sigma_x / sigma_b) - neofs)
-    # https://stackoverflow.com/questions/
-    # 7160162/left-matrix-division-and-numpy-solve
-    # (A.T\B)*A
-    x, resid, rank, s = np.linalg.lstsq(
-        sigma_b, mu_x - mu_b)  # sigma_b \ (mu_x - mu_b)
-    signal = fac * np.matmul((mu_x.values - mu_b.values), x)
+    diff = (mu_x - mu_b)[..., np.newaxis]
+    # log determinants instead of determinants, which under- or overflow for
+    # many EOFs
+    logdet_x = np.linalg.slogdet(sigma_x)[1]
+    try:
+        # sigma_b = L L^T, so tr(sigma_b^-1 sigma_x) = tr(L^-1 sigma_x L^-T)
+        # and diff^T sigma_b^-1 diff = ||L^-1 diff||^2
+        chol_b = np.linalg.cholesky(sigma_b)
+        logdet_b = 2 * np.log(np.diagonal(chol_b, axis1=-2,
+                                          axis2=-1)).sum(-1)
+        trace = np.trace(np.linalg.solve(
+            chol_b, np.linalg.solve(chol_b, sigma_x).swapaxes(-1, -2)),
+            axis1=-2, axis2=-1)
+        signal = fac * (np.linalg.solve(chol_b, diff)**2).sum((-2, -1))
+    except np.linalg.LinAlgError:
+        # sigma_b not positive definite, e.g. fewer members than EOFs:
+        # least squares solution
+        logdet_b = np.linalg.slogdet(sigma_b)[1]
+        sigma_b_inv = np.linalg.pinv(sigma_b)
+        trace = np.trace(np.matmul(sigma_b_inv, sigma_x), axis1=-2, axis2=-1)
+        signal = fac * np.matmul(diff.swapaxes(-1, -2),
+                                 np.matmul(sigma_b_inv, diff))[..., 0, 0]
+    dispersion = fac * (logdet_b - logdet_x + trace - neofs)
     R = dispersion + signal
     return R, dispersion, signal
 
 
+def _project_on_eofs(field, eofs):
+    """Project fields on EOFs.
+
+    Same as `solver.projectField(field, neofs=neofs, eofscaling=0,
+    weighted=False)` for all fields at once.
+
+    Args:
+        field (xr.DataArray): fields with the spatial dimensions of eofs and
+                              any other dimensions.
+        eofs (xr.DataArray): EOFs with dimension mode, see `solver.eofs`.
+
+    Returns:
+        pcs (xr.DataArray): pseudo-PCs with dimension mode instead of the
+                            spatial dimensions.
+    """
+    spatial_dims = [d for d in eofs.dims if d != 'mode']
+    # missing values are at the same locations in field and eofs
+    return xr.dot(field.fillna(0), eofs.fillna(0), dims=spatial_dims)
+
+
+def _mean_and_covariance(pcs, dim='member'):
+    """Mean and covariance matrix of pseudo-PCs over dim.
+
+    Args:
+        pcs (xr.DataArray): pseudo-PCs with dimensions mode and dim.
+        dim (str): dimension of the samples. Default: 'member'
+
+    Returns:
+        mu (np.ndarray): means with shape [..., mode].
+        sigma (np.ndarray): covariance matrices with shape
+                            [..., mode, mode] like `np.cov`.
+    """
+    other_dims = [d for d in pcs.dims if d not in [dim, 'mode']]
+    pcs = pcs.transpose(*other_dims, dim, 'mode').values
+    mu = pcs.mean(-2)
+    anom = pcs - mu[..., np.newaxis, :]
+    sigma = np.einsum('...ni,...nj->...ij', anom, anom) / (pcs.shape[-2] - 1)
+    return mu, sigma
+
+
 def _bootstrap_dim(control, lead_years, time_dim='initialization',
-                   dim='member', dim_label=None):
+                   dim='member', dim_label=None, rng=None):
     """
     Add a `len(dim_label)` dimension `dim` to uninitialized control with
     time_dim by bootstrapping.
 
+    dim and dim_label can also be lists to draw segments for every
+    combination of several new dimensions in one gather.
+
+    rng (np.random.RandomState) is the random state to draw from, the
+    global numpy state by default.
     """
+    if rng is None:
+        rng = np.random
     c_start = 0
     c_end = control[time_dim].size
     time = np.arange(1, 1 + lead_years)
-    if dim_label is None:
-        dim_label = list(np.arange(10))
-
-    def isel_years(control, year_s, length=lead_years):
-        new = control.isel({time_dim: slice(year_s, year_s + length)})
-        new = new.rename({time_dim: 'time'})
-        new['time'] = time
-        return new
-
-    def create_pseudo_members(control):
-        startlist = np.random.randint(
-            c_start, c_end - lead_years - 1, len(dim_label))
-        return xr.concat([isel_years(control, start)
-                          for start in startlist], dim)
-
-    control_uninitialized = create_pseudo_members(
-        control).assign({dim: dim_label})
+    if isinstance(dim, str):
+        dim, dim_label = [dim], [dim_label]
+    dim_label = [list(np.arange(10)) if label is None else label
+                 for label in dim_label]
+
+    # gather all segments at once
+    startlist = rng.randint(
+        c_start, c_end - lead_years - 1, [len(label) for label in dim_label])
+    index = startlist[..., np.newaxis] + np.arange(lead_years)
+    if time_dim in control.coords:
+        control = control.drop(time_dim)
+    control_uninitialized = control.isel(
+        {time_dim: xr.DataArray(index, dims=dim + ['time'])})
+    control_uninitialized['time'] = time
+    control_uninitialized = control_uninitialized.assign(
+        dict(zip(dim, dim_label)))
     return control_uninitialized
 
 
+def _control_eofs(control, neofs, curv=True, eof_cache=None, svd='full'):
+    """EOFs of control for compute_relative_entropy.
+
+    Args:
+        control (xr.Dataset): anomaly control distribution, see
+                              compute_relative_entropy.
+        neofs (int): number of EOFs to use.
+        curv (bool): if curvilinear grids disables EOF weights.
+        eof_cache (str): netCDF file to reuse the EOFs from, see _get_eofs.
+        svd (str): 'full' or 'randomized' SVD, see _get_eofs.
+
+    Returns:
+        eofs (xr.DataArray): unscaled EOFs with dimension mode.
+    """
+    # EOF requires xr.dataArray
+    control = control.to_array().squeeze()
+
+    # prepare for EOF
+    if curv:  # if curvilinear lon(x,y), lat(x,y) data inputs
+        wgts = None
+    else:
+        coslat = np.cos(np.deg2rad(control.coords['lat'].values))
+        wgts = np.sqrt(coslat)[..., np.newaxis]
+
+    if 'member' in control.dims:  # LENS
+        # stack member and initialization into time dim, make time first
+        non_spatial_control_dims = list(
+            set(control.dims).intersection(['initialization', 'member']))
+
+        transpose_dims = list(control.dims)
+        transpose_dims.remove('member')
+        transpose_dims.remove('initialization')
+        dims = tuple(['time'] + transpose_dims)
+        base_to_calc_eofs = control.stack(
+            new=tuple(non_spatial_control_dims)).rename({'new':
+                                                         'time'}).set_index({'time': 'time'}).transpose(*dims)
+    else:
+        # PM_control
+        base_to_calc_eofs = control.rename({'initialization': 'time'})
+
+    return _get_eofs(base_to_calc_eofs, neofs, weights=wgts,
+                     eof_cache=eof_cache, svd=svd)['eofs']
+
+
 def compute_relative_entropy(initialized, control,
                              anomaly_data=False, neofs=None, curv=True,
                              ntime=None,
-                             nmember_control=10):
+                             nmember_control=10,
+                             eof_cache=None,
+                             svd='full',
+                             eofs=None,
+                             rng=None):
     """
     Compute relative entropy.
 
@@ -100,6 +368,17 @@ def compute_relative_entropy(initialized, control,
         ntime (int): number of timesteps calculated.
         nmember_control (int): number of members created from
                                bootstrapping from control
+        eof_cache (str): netCDF file to reuse the EOFs of control from or
+                         to save them to. EOFs are also reused within a
+                         session without it. Default: None.
+        svd (str): 'full' SVD of control or 'randomized' truncated SVD
+                   of only the leading neofs modes for large grids, also
+                   out-of-core for dask-backed control. Default: 'full'.
+        eofs (xr.DataArray): EOFs of control to use instead of computing
+                             them, see _control_eofs. Default: None.
+        rng (np.random.RandomState): random state to bootstrap the control
+                                     members from. Default: None (global
+                                     numpy state).
 
     Returns:
         rel_ent (xr.Dataset): relative entropy
@@ -116,17 +395,12 @@ def compute_relative_entropy(initialized, control,
         control_uninitialized = _bootstrap_dim(
             control, initialized.time.size, time_dim='initialization',
             dim='initialization',
-            dim_label=list(initialized.initialization.values))
+            dim_label=list(initialized.initialization.values), rng=rng)
 
     # case if you only submit control with dim time, PM case
     else:
-        control_uninitialized = xr.concat([
-            _bootstrap_dim(control,
-                           initialized.time.size, dim='member',
-                           dim_label=np.arange(nmember_control))
-            for _ in range(initialized.initialization.size)],
-            dim='initialization')
-        control_uninitialized['initialization'] = initialized.initialization.values
+        control_uninitialized = _create_uninitialized_ensemble_from_control(
+            initialized, control, np.arange(nmember_control), rng=rng)
 
     # initialized and control_uninitialized are allowed to have different
     # dims as I need more members to sample my control distr. properly
@@ -150,87 +424,69 @@ def compute_relative_entropy(initialized, control,
         anom_x = initialized
         anom_b = control_uninitialized
 
-    # prepare for EOF
-    if curv:  # if curvilinear lon(x,y), lat(x,y) data inputs
-        wgts = None
-    else:
-        coslat = np.cos(np.deg2rad(anom_x.coords['lat'].values))
-        wgts = np.sqrt(coslat)[..., np.newaxis]
+    if eofs is None:
+        eofs = _control_eofs(control, neofs, curv=curv, eof_cache=eof_cache,
+                             svd=svd)
+    eofs = eofs.isel(mode=slice(0, neofs))
 
-    # EOF requires xr.dataArray
-    control = control.to_array().squeeze()
+    lead_times = initialized.time.values[:ntime]
+    initializations = initialized.initialization.values
+    # project all initializations, leads and members at once
+    # P_b base distribution
+    pc_b = _project_on_eofs(anom_b.isel(time=slice(0, ntime)), eofs)
+    mu_b, sigma_b = _mean_and_covariance(
+        pc_b.transpose('initialization', 'time', ...))
+    # P_x initialization distribution
+    pc_x = _project_on_eofs(anom_x.isel(time=slice(0, ntime)), eofs)
+    mu_x, sigma_x = _mean_and_covariance(
+        pc_x.transpose('initialization', 'time', ...))
+
+    r, d, s = _relative_entropy_formula(sigma_b, sigma_x, mu_x, mu_b, neofs)
+    dims = ('initialization', 'time')
+    re = xr.Dataset({'R': (dims, r), 'S': (dims, s), 'D': (dims, d)},
+                    coords={'initialization': initializations,
+                            'time': lead_times})
 
-    if 'member' in control.dims:  # LENS
-        # stack member and initialization into time dim, make time first
-        non_spatial_control_dims = list(
-            set(control.dims).intersection(['initialization', 'member']))
+    return re
 
-        transpose_dims = list(control.dims)
-        transpose_dims.remove('member')
-        transpose_dims.remove('initialization')
-        dims = tuple(['time'] + transpose_dims)
-        base_to_calc_eofs = control.stack(
-            new=tuple(non_spatial_control_dims)).rename({'new':
-                                                         'time'}).set_index({'time': 'time'}).transpose(*dims)
-    else:
-        # PM_control
-        base_to_calc_eofs = control.rename({'initialization': 'time'})
 
-    solver = Eof(base_to_calc_eofs, weights=wgts)
+def _create_uninitialized_ensemble_from_control(ds, control, member_label,
+                                                rng=None):
+    """Create uninitialized ensemble from control."""
+    return _bootstrap_dim(
+        control, ds.time.size, dim=['initialization', 'member'],
+        dim_label=[ds.initialization.values, member_label], rng=rng)
 
-    re_leadtime_list = []
-    lead_times = initialized.time.values[:ntime]
-    initializations = initialized.initialization.values
-    # DoTo: parallelize this double loop
-    for init in initializations:  # loop over initializations
-        rl, sl, dl = ([] for _ in range(3))  # lists to store results in
-        for t in lead_times:  # loop over lead time
-            # P_b base distribution
-            pc_b = solver.projectField(anom_b.sel(initialization=init, time=t)
-                                             .drop('time')
-                                             .rename({'member': 'time'}),
-                                       neofs=neofs, eofscaling=0,
-                                       weighted=False)
-
-            mu_b = pc_b.mean('time')
-            sigma_b = xr.DataArray(np.cov(pc_b.T))
-
-            # P_x initialization distribution
-            pc_x = solver.projectField(anom_x.sel(initialization=init, time=t)
-                                             .drop('time')
-                                             .rename({'member': 'time'}),
-                                       neofs=neofs, eofscaling=0,
-                                       weighted=False)
-
-            mu_x = pc_x.mean('time')
-            sigma_x = xr.DataArray(np.cov(pc_x.T))
-
-            r, d, s = _relative_entropy_formula(sigma_b, sigma_x, mu_x, mu_b,
-                                                neofs)
-
-            rl.append(r)
-            sl.append(s)
-            dl.append(d)
-
-        re_leadtime_list.append(xr.Dataset({'R': ('time', rl),
-                                            'S': ('time', sl),
-                                            'D': ('time', dl)}))
-
-    re = xr.concat(re_leadtime_list, dim='initialization').assign(
-        initialization=initializations, time=lead_times)
 
-    return re
+def _bootstrap_relative_entropy_iteration(seed, initialized, control, eofs,
+                                          **kwargs):
+    """One iteration of bootstrap_relative_entropy.
+
+    All random draws come from a random state seeded with `seed`, so the
+    result only depends on the seed and not on where the iteration runs.
+
+    Returns:
+        rel_ent (xr.Dataset): relative entropy of an uninitialized ensemble
+                              drawn from control.
+    """
+    rng = np.random.RandomState(seed)
+    uninitialized_initialized = _create_uninitialized_ensemble_from_control(
+        initialized, control, list(initialized.member.values), rng=rng)
+    return compute_relative_entropy(uninitialized_initialized, control,
+                                    eofs=eofs, rng=rng, **kwargs)
 
 
 def bootstrap_relative_entropy(initialized, control, sig=95,
                                bootstrap=100, curv=True, neofs=None,
                                ntime=None, anomaly_data=False,
-                               nmember_control=15):
+                               nmember_control=15, eof_cache=None,
+                               svd='full', seed=None, n_jobs=None,
+                               executor=None):
     """
     Bootstrap relative entropy threshold.
 
-    Generates a random uninitialized initialization and calculates the relative
-    entropy. sig-th percentile determines threshold level.
+    Generates random uninitialized initializations and calculates their
+    relative entropy. sig-th percentile determines threshold level.
 
     Args:
         initialized (xr.DataArray): initialized ensemble with dimensions
@@ -245,6 +501,20 @@ def bootstrap_relative_entropy(initialized, control, sig=95,
         ntime (int): number of timestep to calculate.
                      Default: initialized.time.size.
         curv (bool): if curvilinear grids are provided disables EOF weights.
+        eof_cache (str): netCDF file to reuse the EOFs of control from or
+                         to save them to, see compute_relative_entropy.
+        svd (str): 'full' or 'randomized' SVD of control, see
+                   compute_relative_entropy.
+        seed (int): seed for the random draws. Every iteration gets its own
+                    seed derived from it, so results are identical for any
+                    number of workers. Defaults to None (seeds are drawn
+                    from the global numpy random state).
+        n_jobs (int): number of processes to distribute the iterations
+                      over. -1 uses all cores, -2 all but one and so on.
+                      Defaults to None (serial).
+        executor (object): executor with a concurrent.futures-like `map`
+                           method to run the iterations on instead, see
+                           bootstrap_perfect_model. Defaults to None.
 
     Returns:
         rel_ent (pd.DataFrame): relative entropy sig-th percentile threshold.
@@ -255,26 +525,22 @@ def bootstrap_relative_entropy(initialized, control, sig=95,
     if ntime is None:
         ntime = initialized.time.size
 
-    def _create_uninitialized_ensemble_from_control(ds, control,
-                                                    member_label):
-        """Create uninitialized ensemble from control."""
-        control_uninitialized = xr.concat([
-            _bootstrap_dim(control, ds.time.size, dim='member',
-                           dim_label=member_label) for _ in
-            range(ds.initialization.size)],
-            dim='initialization')
-        control_uninitialized['initialization'] = ds.initialization.values
-        return control_uninitialized
-
-    results_list = []
-    for _ in range(min(1, int(bootstrap / initialized.time.size))):
-        uninitialized_initialized = _create_uninitialized_ensemble_from_control(
-            initialized, control, list(initialized.member.values))
-        ds_pseudo_rel_ent = compute_relative_entropy(
-            uninitialized_initialized, control, neofs=neofs,
-            curv=curv, ntime=ntime, anomaly_data=anomaly_data,
-            nmember_control=nmember_control)
-        results_list.append(ds_pseudo_rel_ent)
+    # EOFs of control are computed once and shared by all iterations
+    eofs = _control_eofs(control, neofs, curv=curv, eof_cache=eof_cache,
+                         svd=svd)
+    # one seed per iteration, drawn up front in the calling process
+    if seed is None:
+        seeds = np.random.randint(np.iinfo(np.int32).max, size=bootstrap)
+    else:
+        seeds = np.random.RandomState(seed).randint(np.iinfo(np.int32).max,
+                                                    size=bootstrap)
+    iteration = partial(_bootstrap_relative_entropy_iteration,
+                        initialized=initialized, control=control, eofs=eofs,
+                        neofs=neofs, curv=curv, ntime=ntime,
+                        anomaly_data=anomaly_data,
+                        nmember_control=nmember_control)
+    results_list = _executor_map(iteration, seeds, n_jobs=n_jobs,
+                                 executor=executor)
     ds_pseudo_metric = xr.concat(results_list, dim='it')
     qsig = sig / 100
     sig_level = ds_pseudo_metric.quantile(
@@ -6,8 +6,6 @@ import xarray as xr
 from scipy.signal import periodogram
 from scipy.stats import norm
 
-from xskillscore import pearson_r, pearson_r_p_value
-
 
 # --------------------------------------------#
 # HELPER FUNCTIONS
@@ -37,6 +35,107 @@ def _get_vars(ds):
     return list(ds.data_vars)
 
 
+def _np_pearson_r(a, b, mask=None):
+    """Pearson correlation coefficient along the last axis.
+
+    Args:
+        a, b (ndarray): arrays broadcastable against each other.
+        mask (optional ndarray): only use positions where mask is True.
+
+    Returns:
+        r (ndarray): correlation coefficients.
+        n (int or ndarray): number of samples the correlation is based on.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if mask is None:
+            n = a.shape[-1]
+            a = a - a.mean(axis=-1, keepdims=True)
+            b = b - b.mean(axis=-1, keepdims=True)
+        else:
+            n = mask.sum(axis=-1)
+            a = np.where(mask, a, 0.)
+            b = np.where(mask, b, 0.)
+            a -= (a.sum(axis=-1) / n)[..., np.newaxis]
+            b -= (b.sum(axis=-1) / n)[..., np.newaxis]
+            a *= mask
+            b *= mask
+        r = np.einsum('...i,...i->...', a, b) / np.sqrt(
+            np.einsum('...i,...i->...', a, a) *
+            np.einsum('...i,...i->...', b, b))
+    # rounding can push perfectly (anti)correlated series beyond [-1, 1]
+    return np.clip(r, -1., 1.), n
+
+
+def _np_t_test_p_value(r, n):
+    """Two-sided p value of a correlation coefficient based on n samples."""
+    dof = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = r * np.sqrt(dof / (1 - r**2))
+    return 2 * ss.t.sf(np.abs(t), dof)
+
+
+def _np_eff_p_value(a, b, r, mask=None):
+    """p value of r accounting for lag-1 autocorrelation in a and b."""
+    if mask is None:
+        n = a.shape[-1]
+        pair_mask = None
+    else:
+        n = mask.sum(axis=-1)
+        pair_mask = mask[..., 1:] & mask[..., :-1]
+    aauto, _ = _np_pearson_r(a[..., 1:], a[..., :-1], pair_mask)
+    bauto, _ = _np_pearson_r(b[..., 1:], b[..., :-1], pair_mask)
+    # compute effective sample size, at maximum the number of samples
+    n_eff = np.floor(n * (1 - aauto * bauto) / (1 + aauto * bauto))
+    n_eff = np.minimum(n_eff, n)
+    return _np_t_test_p_value(r, n_eff)
+
+
+def _np_pearson_r_p_value(a, b, mask=None, eff_p=False, return_p=True):
+    """Pearson r and optionally its p value and the effective-sample-size p
+    value along the last axis from a single set of moments."""
+    r, n = _np_pearson_r(a, b, mask)
+    res = [r]
+    if return_p:
+        res.append(_np_t_test_p_value(r, n))
+    if eff_p:
+        res.append(_np_eff_p_value(a, b, r, mask))
+    return tuple(res) if len(res) > 1 else r
+
+
+def _xr_pearson_r_p_value(x, y, dim, mask=None, eff_p=False, return_p=True):
+    """Fused pearson r and p value kernel for xarray objects.
+
+    Computes the correlation coefficient and, if requested, its two-sided p
+    value and the p value accounting for autocorrelation (see
+    ``_xr_eff_p_value``) in one pass over the data.
+
+    Args:
+        x, y (xarray object): time series or grids of time series.
+        dim (str): dimension to correlate over.
+        mask (optional xr.DataArray): only use positions where mask is True.
+        eff_p (optional bool): If True, also return the effective-sample-size
+                               p value.
+        return_p (optional bool): If False, skip the t-test and only return
+                                  r (and p_eff). Default: True
+
+    Returns:
+        r (xarray object): correlation coefficients.
+        p (xarray object): If `return_p`, p values.
+        p_eff (xarray object): If `eff_p`, effective-sample-size p values.
+    """
+    x, y = xr.broadcast(x, y, exclude=[dim])
+    args = [x, y]
+    if mask is not None:
+        args.append(mask)
+    nout = 1 + return_p + eff_p
+    return xr.apply_ufunc(_np_pearson_r_p_value, *args,
+                          kwargs={'eff_p': eff_p, 'return_p': return_p},
+                          input_core_dims=[[dim]] * len(args),
+                          output_core_dims=[[]] * nout,
+                          dask='parallelized',
+                          output_dtypes=[float] * nout)
+
+
 # ----------------------------------#
 # TIME SERIES
 # Functions related to time series.
@@ -82,17 +181,16 @@ def xr_corr(x, y, dim='time', lag=0, return_p=False):
         if dim not in list(x.coords):
             normal[dim] = np.arange(1, N)
         shifted[dim] = normal[dim]
-        r = pearson_r(normal, shifted, dim)
+        r = _xr_pearson_r_p_value(normal, shifted, dim, return_p=False)
+        if return_p:
+            p = _xr_eff_p_value(x, y, r, dim)
     else:
-        r = pearson_r(x, y, dim)
+        if return_p:
+            r, p = _xr_pearson_r_p_value(x, y, dim, eff_p=True,
+                                         return_p=False)
+        else:
+            r = _xr_pearson_r_p_value(x, y, dim, return_p=False)
     if return_p:
-        p = _xr_eff_p_value(x, y, r, dim)
-        # return with proper dimension labeling. would be easier with
-        # apply_ufunc, but having trouble getting it to work here. issue
-        # probably has to do with core dims.
-        dimlist = _get_dims(r)
-        for i in range(len(dimlist)):
-            p = p.rename({'dim_' + str(i): dimlist[i]})
         return r, p
     else:
         return r
@@ -114,34 +212,10 @@ def _xr_eff_p_value(x, y, r, dim):
         * Wilks, Daniel S. Statistical methods in the atmospheric sciences.
           Vol. 100. Academic press, 2011.
     """
-    def _compute_autocorr(v, dim, n):
-        """
-        Return normal and shifted time series
-        with equal dimensions so as not to
-        throw an error.
-        """
-        shifted = v.isel({dim: slice(1, n)})
-        normal = v.isel({dim: slice(0, n-1)})
-        # see explanation in xr_autocorr for this
-        if dim not in list(v.coords):
-            normal[dim] = np.arange(1, n)
-        shifted[dim] = normal[dim]
-        return pearson_r(shifted, normal, dim)
-
-    n = x[dim].size
-    # find autocorrelation
-    xa, ya = x - x.mean(dim), y - y.mean(dim)
-    xauto = _compute_autocorr(xa, dim, n)
-    yauto = _compute_autocorr(ya, dim, n)
-    # compute effective sample size
-    n_eff = n * (1 - xauto * yauto) / (1 + xauto * yauto)
-    n_eff = np.floor(n_eff)
-    # constrain n_eff to be at maximum the total number of samples
-    n_eff = n_eff.where(n_eff <= n, n)
-    # compute t-statistic
-    t = r * np.sqrt((n_eff - 2) / (1 - r**2))
-    p = xr.DataArray(ss.t.sf(np.abs(t), n_eff - 2) * 2)
-    return p
+    return xr.apply_ufunc(_np_eff_p_value, x, y, r,
+                          input_core_dims=[[dim], [dim], []],
+                          dask='parallelized',
+                          output_dtypes=[float])
 
 
 def xr_rm_poly(ds, order, dim='time'):
@@ -268,12 +342,13 @@ def xr_varweighted_mean_period(ds, time_dim='time'):
         """
         Organize results of periodogram into clean dataset.
         """
-        dimlist = [i for i in _get_dims(ds) if i not in [time_dim]]
-        PSD = xr.DataArray(Pxx, dims=['freq'] + dimlist)
+        dimlist = ['freq' if i == time_dim else i for i in _get_dims(ds)]
+        PSD = xr.DataArray(Pxx, dims=dimlist)
         PSD.coords['freq'] = f
         return PSD
 
-    f, Pxx = periodogram(ds, axis=0, scaling='spectrum')
+    f, Pxx = periodogram(ds, axis=ds.get_axis_num(time_dim),
+                         scaling='spectrum')
     PSD = _create_dataset(ds, f, Pxx, time_dim)
     T = PSD.sum('freq') / ((PSD * PSD.freq).sum('freq'))
     return T
@@ -307,15 +382,13 @@ def xr_autocorr(ds, lag=1, dim='time', return_p=False):
     if dim not in list(ds.coords):
         normal[dim] = np.arange(1, N)
     shifted[dim] = normal[dim]
-    r = pearson_r(normal, shifted, dim)
+    # NOTE: This assumes 2-tailed. Need to update xr_eff_pearsonr
+    # to utilize xskillscore's metrics but then compute own effective
+    # p-value with option for one-tailed.
     if return_p:
-        # NOTE: This assumes 2-tailed. Need to update xr_eff_pearsonr
-        # to utilize xskillscore's metrics but then compute own effective
-        # p-value with option for one-tailed.
-        p = pearson_r_p_value(normal, shifted, dim)
-        return r, p
+        return _xr_pearson_r_p_value(normal, shifted, dim)
     else:
-        return r
+        return _xr_pearson_r_p_value(normal, shifted, dim, return_p=False)
 
 
 def xr_decorrelation_time(da, r=20, dim='time'):
@@ -384,56 +457,21 @@ def DPP(ds, m=10, chunk=True):
         dpp (xr.DataArray): ds without time dimension.
 
     """
-    # TODO: rename or find xr equiv
-    def _chunking(ds, number_chunks=False, chunk_length=False):
-        """
-        Separate data into chunks and reshapes chunks in a c dimension.
-
-        Specify either the number chunks or the length of chunks.
-        Needed for DPP.
-
-        Args:
-            ds (xr.DataArray): control simulation with time dimension as years.
-            chunk_length (int): see DPP(m)
-            number_chunks (int): number of chunks in the return data.
-
-        Returns:
-            c (xr.DataArray): chunked ds, but with additional dimension c.
-
-        """
-        if number_chunks and not chunk_length:
-            chunk_length = np.floor(ds['time'].size / number_chunks)
-            cmin = int(ds['time'].min())
-        elif not number_chunks and chunk_length:
-            cmin = int(ds['time'].min())
-            number_chunks = int(np.floor(ds['time'].size / chunk_length))
-        else:
-            raise ValueError('set number_chunks or chunk_length to True')
-        c = ds.sel(time=slice(cmin, cmin + chunk_length - 1))
-        c = c.expand_dims('c')
-        c['c'] = [0]
-        for i in range(1, number_chunks):
-            c2 = ds.sel(time=slice(cmin + chunk_length * i,
-                                   cmin + (i + 1) * chunk_length - 1))
-            c2 = c2.expand_dims('c')
-            c2['c'] = [i]
-            c2['time'] = c['time']
-            c = xr.concat([c, c2], 'c')
-        return c
-
     if not chunk:  # Resplandy 2015, Seferian 2018
         s2v = ds.rolling(time=m).mean().var('time')
         s2 = ds.var('time')
 
     if chunk:  # Boer 2004 ppvf
-        # first chunk
-        chunked_means = _chunking(
-            ds, chunk_length=m).mean('time')
-        # sub means in chunks
-        chunked_deviations = _chunking(
-            ds, chunk_length=m) - chunked_means
-        s2v = chunked_means.var('c')
-        s2e = chunked_deviations.var(['time', 'c'])
+        # contiguous chunks of length m, remaining time steps are dropped
+        if 'time' in ds.coords:
+            ds = ds.drop('time')
+        chunks = ds.coarsen(time=m, boundary='trim').construct(
+            time=('time', 'window'))
+        # variance of chunk means and pooled variance within chunks, both
+        # from the one pass computing the chunk means
+        means = chunks.mean('window')
+        s2v = means.var('time')
+        s2e = ((chunks - means)**2).mean(['time', 'window'])
         s2 = s2v + s2e
     dpp = (s2v - s2 / (m)) / s2
     return dpp
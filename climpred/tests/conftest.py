@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+
+@pytest.fixture
+def DPLE_da_ds():
+    initialization = np.arange(1960, 1980)
+    lead = np.arange(1, 6)
+    member = np.arange(3)
+    lats = np.arange(4)
+    data = np.random.rand(len(initialization), len(lead), len(member),
+                          len(lats))
+    return xr.DataArray(data,
+                        coords=[initialization, lead, member, lats],
+                        dims=['initialization', 'time', 'member', 'lat'])
+
+
+@pytest.fixture
+def DPLE_da_reference():
+    initialization = np.arange(1960, 1980)
+    lats = np.arange(4)
+    data = np.random.rand(len(initialization), len(lats))
+    return xr.DataArray(data,
+                        coords=[initialization, lats],
+                        dims=['initialization', 'lat'])
+
+
+@pytest.fixture
+def DPLE_da_control():
+    time = np.arange(1950, 2000)
+    lats = np.arange(4)
+    data = np.random.rand(len(time), len(lats))
+    return xr.DataArray(data,
+                        coords=[time, lats],
+                        dims=['time', 'lat'])
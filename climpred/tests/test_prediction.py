@@ -1,10 +1,28 @@
+import os
+from collections import OrderedDict
+
+import dask
 import numpy as np
 import pandas as pd
 import pytest
 import xarray as xr
+from dask.callbacks import Callback
 
-from climpred.bootstrap import bootstrap_perfect_model
-from climpred.prediction import compute_perfect_model, compute_persistence_pm
+from climpred import PerfectModelEnsemble, bootstrap, classes, prediction
+from climpred.bootstrap import (_P2Quantile, _n_workers,
+                                _persistence_pm_from_statistics,
+                                _persistence_pm_statistics, _pseudo_ens,
+                                _pseudo_ens_first_lead,
+                                _stream_bootstrap_results,
+                                bootstrap_perfect_model)
+from climpred.prediction import (_get_comparison, _get_metric,
+                                 _get_metric_function, _get_variance,
+                                 _gufunc_metric, _m2m,
+                                 compute_perfect_model,
+                                 compute_persistence, compute_persistence_pm,
+                                 compute_reference, register_metric,
+                                 xr_predictability_horizon)
+from xskillscore import pearson_r_p_value
 
 xskillscore_metrics = ('pearson_r', 'rmse', 'mse', 'mae')
 xskillscore_distance_metrics = ('rmse', 'mse', 'mae')
@@ -115,3 +133,509 @@ def test_compute_persistence_pm_ds_not_nan(PM_ds_ds, PM_ds_control, metric):
     actual = compute_persistence_pm(
         PM_ds_ds, PM_ds_control, 2, metric=metric, dim='time').isnull().any()
     assert actual == False
+
+
+def test_m2m_supervector_pairs(PM_da_ds):
+    """m2m pairs every member with every other member at each
+    initialization."""
+    forecast, reference = _m2m(PM_da_ds)
+    nmember = PM_da_ds.member.size
+    ninit = PM_da_ds.initialization.size
+    assert forecast.svd.size == nmember * (nmember - 1) * ninit
+    assert reference.svd.size == forecast.svd.size
+    assert (forecast != reference).all()
+
+
+@pytest.mark.parametrize('comparison', PM_comparisons)
+def test_compute_perfect_model_metric_list(PM_ds_ds, PM_ds_control,
+                                           comparison):
+    """A list of metrics gives the skill of every single metric."""
+    metrics = list(all_metrics) + ['ppp', 'uacc']
+    actual = compute_perfect_model(PM_ds_ds, PM_ds_control, metric=metrics,
+                                   comparison=comparison)
+    assert list(actual.metric.values) == metrics
+    for metric in metrics:
+        expected = compute_perfect_model(PM_ds_ds, PM_ds_control,
+                                         metric=metric, comparison=comparison)
+        xr.testing.assert_allclose(actual.sel(metric=metric, drop=True),
+                                   expected)
+
+
+def test_control_variance_computed_once(PM_da_ds, PM_da_control, PM_ds_ds,
+                                        PM_ds_control, monkeypatch):
+    """The control variance is computed once per bootstrap_perfect_model
+    call and per PerfectModelEnsemble.add_control and passed down."""
+    calls = []
+
+    def _count(control, **kwargs):
+        calls.append(kwargs)
+        return _get_variance(control, **kwargs)
+
+    monkeypatch.setattr(prediction, '_get_variance', _count)
+    monkeypatch.setattr(bootstrap, '_get_variance', _count)
+    monkeypatch.setattr(classes, '_get_variance', _count)
+    bootstrap_perfect_model(PM_da_ds, PM_da_control, metric='nrmse',
+                            bootstrap=3, compute_persistence_skill=False)
+    assert len(calls) == 1
+    calls.clear()
+    pm = PerfectModelEnsemble(PM_ds_ds)
+    pm.add_control(PM_ds_control)
+    actual = pm.compute_metric(metric=['nrmse', 'ppp'])
+    pm.compute_metric(metric='nmae', comparison='m2m')
+    assert len(calls) == 1
+    expected = compute_perfect_model(PM_ds_ds, PM_ds_control,
+                                     metric=['nrmse', 'ppp'])
+    xr.testing.assert_allclose(actual, expected)
+    # smoothed variances are not the one computed by add_control
+    pm.compute_metric(metric='nrmse', running=5,
+                      reference_period='OP_full_length')
+    assert calls[-1] == dict(time_length=5,
+                             reference_period='OP_full_length')
+
+
+def test_get_variance_lazy(PM_ds_control):
+    """Variances of dask-backed controls stay lazy."""
+    control = PM_ds_control.chunk({'lat': 2})
+    with dask.config.set(scheduler=_raise_on_compute):
+        actual = _get_variance(control)
+    assert dask.is_dask_collection(actual)
+    xr.testing.assert_allclose(actual.compute(), PM_ds_control.var('time'))
+
+
+@pytest.mark.parametrize('name,aliases', [('pearson_r', ['pr', 'Pearsonr']),
+                                          ('ppp', ['msss']),
+                                          ('nmse', ['nev'])])
+def test_metric_registry(name, aliases):
+    """Names, aliases and metric functions resolve to one registered
+    metric."""
+    metric = _get_metric(name)
+    assert metric.name == name
+    for alias in aliases:
+        assert _get_metric(alias) is metric
+    assert _get_metric(metric.function) is metric
+    assert _get_metric_function(name) is metric.function
+    with pytest.raises(ValueError):
+        _get_metric('not_a_metric')
+
+
+def test_comparison_registry():
+    """Comparisons declare whether they are perfect-model comparisons and
+    their normalization factor."""
+    assert _get_comparison('m2m').norm_factor == 2
+    assert _get_comparison('m2e').norm_factor == 1
+    assert not _get_comparison('e2r').perfect_model
+    assert _get_comparison(_m2m) is _get_comparison('m2m')
+    with pytest.raises(ValueError):
+        _get_comparison('m2x')
+    with pytest.raises(ValueError):
+        compute_perfect_model(None, None, comparison='e2r')
+
+
+def test_register_metric(DPLE_da_ds, DPLE_da_reference, DPLE_da_control,
+                         monkeypatch):
+    """A registered numpy metric gives the same skill as the built-in metric
+    in all compute functions, also with batched bootstrapping and dask."""
+    monkeypatch.setattr(prediction, '_METRICS',
+                        OrderedDict(prediction._METRICS))
+
+    def my_mse(a, b):
+        return ((a - b)**2).mean(axis=-1)
+
+    register_metric('my_mse', my_mse, aliases=['mymse'])
+    with pytest.raises(ValueError):
+        register_metric('MSE', my_mse)
+    funcs = [
+        lambda ds, ref, ctrl, metric: compute_reference(ds, ref,
+                                                        metric=metric),
+        lambda ds, ref, ctrl, metric: compute_persistence(
+            ds.assign_coords(initialization=ds.initialization + 3), ref, 3,
+            metric=metric),
+        lambda ds, ref, ctrl, metric: compute_persistence_pm(
+            ds, ctrl, 3, metric=metric),
+        lambda ds, ref, ctrl, metric: compute_perfect_model(
+            ds, ctrl, metric=metric, comparison='m2e').transpose(
+                'time', 'lat')]
+    for func in funcs:
+        expected = func(DPLE_da_ds, DPLE_da_reference, DPLE_da_control, 'mse')
+        xr.testing.assert_allclose(
+            func(DPLE_da_ds, DPLE_da_reference, DPLE_da_control, 'mymse'),
+            expected)
+        lazy = func(DPLE_da_ds.chunk({'lat': 2}),
+                    DPLE_da_reference.chunk({'lat': 2}),
+                    DPLE_da_control.chunk({'lat': 2}), 'my_mse')
+        _assert_lazy_equals_eager(lazy, expected)
+    kwargs = dict(comparison='m2e', bootstrap=4, seed=42, batch_size=2)
+    xr.testing.assert_allclose(
+        bootstrap_perfect_model(DPLE_da_ds, DPLE_da_control, metric='my_mse',
+                                **kwargs),
+        bootstrap_perfect_model(DPLE_da_ds, DPLE_da_control, metric='mse',
+                                **kwargs))
+
+
+@pytest.mark.parametrize('metric', ['pearson_r', 'rmse', 'mse', 'mae'])
+def test_metric_kernels(DPLE_da_ds, DPLE_da_reference, metric, monkeypatch):
+    """Compiled kernels give the skill of xskillscore, also with NaN, and
+    the metrics fall back to xskillscore without them."""
+    pytest.importorskip('numba')
+    from climpred.kernels import _KERNELS
+    a = DPLE_da_ds.isel(member=0, time=0)
+    b = DPLE_da_reference.transpose('lat', 'initialization')
+    b[0, 0] = np.nan
+    expected = _get_metric_function(metric)(a, b, 'initialization')
+    for dtype in ['float32', 'float64']:
+        actual = _gufunc_metric(a.astype(dtype), b.astype(dtype),
+                                'initialization', _KERNELS[metric])
+        assert actual.dims == expected.dims
+        xr.testing.assert_allclose(actual, expected, rtol=1e-4)
+    control = xr.DataArray(np.random.rand(50, 4),
+                           coords=[np.arange(1950, 2000), np.arange(4)],
+                           dims=['time', 'lat'])
+    expected = compute_perfect_model(DPLE_da_ds, control, metric=metric,
+                                     comparison='m2e')
+    monkeypatch.setattr(_get_metric(metric), 'kernel', None)
+    xr.testing.assert_allclose(
+        compute_perfect_model(DPLE_da_ds, control, metric=metric,
+                              comparison='m2e'), expected)
+
+
+@pytest.mark.parametrize('metric', list(OrderedDict(
+    (m.name, None) for m in prediction._METRICS.values()
+    if 'm2m' in m.closed_form)))
+def test_m2m_closed_form_equals_supervector(PM_ds_ds, PM_ds_control, metric,
+                                           monkeypatch):
+    """Closed-form m2m metrics match the metric over the supervectors."""
+    expected = _get_metric(metric).function(*_m2m(PM_ds_ds), dim='svd')
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('m2m supervectors built')
+
+    monkeypatch.setattr(_get_comparison('m2m'), 'function', _fail)
+    actual = compute_perfect_model(PM_ds_ds, PM_ds_control, metric=metric,
+                                   comparison='m2m')
+    xr.testing.assert_allclose(actual.transpose(*expected.dims), expected)
+
+
+def _shift(a, b, lag, dim='time'):
+    """Reference implementation aligning a single lead: shift b by lag
+    along dim and give it the coordinates of a."""
+    N = a[dim].size
+    a = a.isel({dim: slice(0, N - lag)})
+    b = b.isel({dim: slice(0 + lag, N)})
+    b[dim] = a[dim]
+    return a, b
+
+
+@pytest.mark.parametrize('metric', xskillscore_metrics)
+def test_compute_reference_equals_lag_loop(DPLE_da_ds, DPLE_da_reference,
+                                           metric):
+    """All leads at once give the same skill as shifting lead by lead."""
+    forecast = DPLE_da_ds.mean('member')
+    nlags = forecast.time.size
+    metric_function = _get_metric_function(metric)
+    expected = []
+    for i in range(nlags):
+        a, b = _shift(forecast.isel(time=i), DPLE_da_reference, i,
+                      dim='initialization')
+        expected.append(metric_function(a, b, dim='initialization'))
+    expected = xr.concat(expected, 'time')
+    expected['time'] = np.arange(1, 1 + nlags)
+    actual = compute_reference(DPLE_da_ds, DPLE_da_reference, metric=metric)
+    xr.testing.assert_allclose(actual.transpose(*expected.dims), expected)
+
+
+@pytest.mark.parametrize('metric', xskillscore_metrics)
+def test_compute_reference_gridded(metric, monkeypatch):
+    """Gridded hindcasts match shifting lead by lead, and every lead is
+    evaluated on views of the input instead of gathered copies."""
+    rng = np.random.RandomState(0)
+    ds = xr.DataArray(rng.rand(30, 6, 5, 7),
+                      coords=[np.arange(1960, 1990), np.arange(1, 7),
+                              np.arange(5), np.arange(7)],
+                      dims=['initialization', 'time', 'lat', 'lon'])
+    reference = xr.DataArray(rng.rand(30, 5, 7),
+                             coords=[np.arange(1960, 1990), np.arange(5),
+                                     np.arange(7)],
+                             dims=['initialization', 'lat', 'lon'])
+    metric_function = _get_metric_function(metric)
+    expected = []
+    for i in range(ds.time.size):
+        a, b = _shift(ds.isel(time=i), reference, i, dim='initialization')
+        expected.append(metric_function(a, b, dim='initialization'))
+    expected = xr.concat(expected, 'time')
+    expected['time'] = ds.time.values
+    reduce = _get_metric(metric).reduce
+
+    def _reduce_views(a, b):
+        assert np.shares_memory(a, ds.values)
+        assert np.shares_memory(b, reference.values)
+        return reduce(a, b)
+
+    monkeypatch.setattr(_get_metric(metric), 'reduce', _reduce_views)
+    actual = compute_reference(ds, reference, metric=metric)
+    assert actual.dims == ('time', 'lat', 'lon')
+    xr.testing.assert_allclose(actual, expected.transpose(*actual.dims))
+
+
+def test_compute_reference_return_p(DPLE_da_ds, DPLE_da_reference):
+    """p values come out of the same pass as the correlations."""
+    forecast = DPLE_da_ds.mean('member')
+    _, p = compute_reference(DPLE_da_ds, DPLE_da_reference, return_p=True)
+    for i in range(forecast.time.size):
+        a, b = _shift(forecast.isel(time=i), DPLE_da_reference, i,
+                      dim='initialization')
+        expected = pearson_r_p_value(a, b, dim='initialization')
+        np.testing.assert_allclose(p.isel(time=i).values, expected.values)
+
+
+@pytest.mark.parametrize('metric', xskillscore_metrics)
+def test_compute_persistence_pm_equals_lag_loop(metric):
+    """All lags gathered at once match selecting lag by lag."""
+    control = xr.DataArray(np.random.rand(100, 3),
+                           coords=[np.arange(3000, 3100), np.arange(3)],
+                           dims=['time', 'lat'])
+    ds = xr.DataArray(np.random.rand(3, 4, 2),
+                      coords=[np.arange(1, 4), [3010, 3020, 3050, 3080],
+                              np.arange(2)],
+                      dims=['time', 'initialization', 'member'])
+    nlags = 5
+    metric_function = _get_metric_function(metric)
+    inits = ds.initialization.values
+    expected = []
+    for lag in range(1, 1 + nlags):
+        ref = control.sel(time=inits + lag)
+        fct = control.sel(time=inits)
+        ref['time'] = fct['time']
+        expected.append(metric_function(ref, fct, dim='time'))
+    expected = xr.concat(expected, 'time')
+    expected['time'] = np.arange(1, 1 + nlags)
+    actual = compute_persistence_pm(ds, control, nlags, metric=metric)
+    xr.testing.assert_allclose(actual.transpose(*expected.dims), expected)
+
+
+@pytest.mark.parametrize('metric', xskillscore_metrics)
+def test_compute_persistence_equals_lag_loop(DPLE_da_ds, DPLE_da_reference,
+                                             metric):
+    """All lags gathered at once match intersecting lag by lag."""
+    # initializations partly outside of the reference record
+    ds = DPLE_da_ds.assign_coords(
+        initialization=DPLE_da_ds.initialization.values + 5)
+    nlags = 4
+    metric_function = _get_metric_function(metric)
+    expected = []
+    for lag in range(1, 1 + nlags):
+        ctrl_inits = DPLE_da_reference.initialization.values[:-lag]
+        inits = np.array([i for i in ds.initialization.values
+                          if i in ctrl_inits])
+        ref = DPLE_da_reference.sel(initialization=inits + lag)
+        fct = DPLE_da_reference.sel(initialization=inits)
+        ref['initialization'] = fct['initialization']
+        expected.append(metric_function(ref, fct, dim='initialization'))
+    expected = xr.concat(expected, 'time')
+    expected['time'] = np.arange(1, 1 + nlags)
+    actual = compute_persistence(ds, DPLE_da_reference, nlags, metric=metric)
+    xr.testing.assert_allclose(actual.transpose(*expected.dims), expected)
+
+
+def test_bootstrap_perfect_model_n_jobs_identical(PM_da_ds, PM_da_control):
+    """Seeded bootstrap results do not depend on the number of workers."""
+    kwargs = dict(metric='rmse', comparison='m2e', bootstrap=4, seed=42)
+    serial = bootstrap_perfect_model(PM_da_ds, PM_da_control, **kwargs)
+    parallel = bootstrap_perfect_model(PM_da_ds, PM_da_control, n_jobs=2,
+                                       **kwargs)
+    xr.testing.assert_identical(serial, parallel)
+
+
+def test_n_workers(monkeypatch):
+    """Negative n_jobs count back from the number of cores, 0 is invalid."""
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    assert _n_workers(None) == 1
+    assert _n_workers(3) == 3
+    assert _n_workers(-1) == 4
+    assert _n_workers(-2) == 3
+    assert _n_workers(-10) == 1
+    with pytest.raises(ValueError):
+        _n_workers(0)
+
+
+def test_bootstrap_perfect_model_n_jobs_zero(PM_da_ds, PM_da_control):
+    with pytest.raises(ValueError):
+        bootstrap_perfect_model(PM_da_ds, PM_da_control, bootstrap=2,
+                                n_jobs=0)
+
+
+@pytest.mark.parametrize('comparison', ['m2e', 'm2m', 'm2c', 'e2c'])
+def test_bootstrap_perfect_model_batch_size(DPLE_da_ds, DPLE_da_control,
+                                            comparison):
+    """Batched resampling draws the same samples as single iterations."""
+    kwargs = dict(metric='rmse', comparison=comparison, bootstrap=5, seed=42)
+    serial = bootstrap_perfect_model(DPLE_da_ds, DPLE_da_control, **kwargs)
+    batched = bootstrap_perfect_model(DPLE_da_ds, DPLE_da_control,
+                                      batch_size=2, **kwargs)
+    xr.testing.assert_allclose(serial, batched)
+
+
+def test_bootstrap_perfect_model_streaming(PM_da_ds, PM_da_control):
+    """Streaming reduction is exact below five iterations."""
+    kwargs = dict(metric='rmse', comparison='m2e', bootstrap=4, seed=42)
+    expected = bootstrap_perfect_model(PM_da_ds, PM_da_control, **kwargs)
+    actual = bootstrap_perfect_model(PM_da_ds, PM_da_control, streaming=True,
+                                     **kwargs)
+    xr.testing.assert_allclose(expected, actual)
+
+
+def test_bootstrap_perfect_model_streaming_close(PM_da_ds, PM_da_control):
+    """Streaming confidence levels are close to the quantiles of all
+    iterations and p values are exact."""
+    kwargs = dict(metric='rmse', comparison='m2e', bootstrap=100, seed=42)
+    expected = bootstrap_perfect_model(PM_da_ds, PM_da_control, **kwargs)
+    actual = bootstrap_perfect_model(PM_da_ds, PM_da_control, streaming=True,
+                                     **kwargs)
+    for ci in ['init_ci', 'uninit_ci', 'pers_ci']:
+        xr.testing.assert_allclose(actual[ci], expected[ci], atol=0.1)
+    for p in ['p_uninit_over_init', 'p_pers_over_init']:
+        xr.testing.assert_allclose(actual[p], expected[p])
+
+
+def test_stream_bootstrap_results_dask():
+    """Lazy iterations are computed once each and match eager input."""
+    rng = np.random.RandomState(0)
+    results = [tuple(xr.DataArray(rng.rand(4, 3), dims=['time', 'lat'])
+                     for _ in range(3)) for _ in range(6)]
+    q = [0.025, 0.975]
+    expected = _stream_bootstrap_results(results, q, q, 'rmse')
+    computes = []
+
+    class CountComputes(Callback):
+        def _start(self, dsk):
+            computes.append(dsk)
+
+    lazy = ((r.chunk({'lat': 1}) for r in res) for res in results)
+    with CountComputes():
+        actual = _stream_bootstrap_results(lazy, q, q, 'rmse')
+    assert len(computes) == len(results)
+    for a, e in zip(actual, expected):
+        assert not dask.is_dask_collection(a)
+        xr.testing.assert_allclose(a, e)
+
+
+@pytest.mark.parametrize('q', [0.025, 0.5, 0.975])
+def test_p2_quantile(q):
+    """P-square estimate is close to the exact quantile and skips NaNs."""
+    x = np.random.normal(size=(2000, 3))
+    x[1000:, 1] = np.nan
+    x[:, 2] = np.nan
+    estimator = _P2Quantile(q, (3,))
+    for sample in x:
+        estimator.update(sample)
+    expected = np.nanquantile(x[:, :2], q, axis=0)
+    np.testing.assert_allclose(estimator.result()[:2], expected, atol=0.15)
+    assert np.isnan(estimator.result()[2])
+
+
+@pytest.mark.parametrize('metric', xskillscore_metrics)
+def test_persistence_pm_from_statistics(DPLE_da_ds, DPLE_da_control,
+                                        metric):
+    """Persistence of a resample assembled from cached per-initialization
+    terms matches computing it directly."""
+    nlags = 3
+    index = np.random.randint(0, DPLE_da_ds.initialization.size,
+                              DPLE_da_ds.initialization.size)
+    expected = compute_persistence_pm(DPLE_da_ds.isel(initialization=index),
+                                      DPLE_da_control, nlags, metric=metric)
+    statistics = _persistence_pm_statistics(DPLE_da_ds, DPLE_da_control,
+                                            nlags, metric=metric)
+    counts = xr.DataArray(np.bincount(index, minlength=index.size),
+                          dims='initialization')
+    actual = _persistence_pm_from_statistics(statistics, counts)
+    xr.testing.assert_allclose(actual, expected)
+
+
+def test_pseudo_ens_segments(DPLE_da_ds, DPLE_da_control):
+    """Pseudo-ensemble members are contiguous segments of the control."""
+    rng = np.random.RandomState(0)
+    starts = np.random.RandomState(0).randint(
+        0, DPLE_da_control.time.size - DPLE_da_ds.time.size - 1,
+        (DPLE_da_ds.initialization.size, DPLE_da_ds.member.size))
+    actual = _pseudo_ens(DPLE_da_ds, DPLE_da_control, rng=rng)
+    assert actual.dims == ('initialization', 'member', 'time', 'lat')
+    xr.testing.assert_equal(actual['time'], DPLE_da_ds['time'])
+    for i, m in [(0, 0), (5, 2), (19, 1)]:
+        start = starts[i, m]
+        expected = DPLE_da_control.isel(
+            time=slice(start, start + DPLE_da_ds.time.size))
+        np.testing.assert_equal(actual.isel(initialization=i, member=m).values,
+                                expected.values)
+
+
+def test_pseudo_ens_first_lead(DPLE_da_ds, DPLE_da_control):
+    """First lead gathered for several draws at once equals the first lead
+    of full pseudo-ensembles."""
+    expected = xr.concat(
+        [_pseudo_ens(DPLE_da_ds, DPLE_da_control,
+                     rng=np.random.RandomState(seed)).isel(time=0)
+         for seed in range(3)], 'bootstrap')
+    actual = _pseudo_ens_first_lead(
+        DPLE_da_ds, DPLE_da_control,
+        [np.random.RandomState(seed) for seed in range(3)])
+    xr.testing.assert_identical(actual, expected)
+
+
+def _raise_on_compute(dsk, keys, **kwargs):
+    """dask scheduler failing on any computation."""
+    raise AssertionError('dask graph computed')
+
+
+def _assert_lazy_equals_eager(lazy, eager):
+    assert lazy.chunks is not None
+    xr.testing.assert_allclose(lazy.compute(), eager)
+
+
+@pytest.mark.parametrize('comparison', PM_comparisons)
+@pytest.mark.parametrize('metric', all_metrics + ('ppp',))
+def test_compute_perfect_model_lazy(PM_da_ds, PM_da_control, metric,
+                                    comparison):
+    """Chunked input gives a dask-backed skill without computing."""
+    kwargs = dict(metric=metric, comparison=comparison)
+    with dask.config.set(scheduler=_raise_on_compute):
+        lazy = compute_perfect_model(PM_da_ds.chunk({'lat': 2}),
+                                     PM_da_control.chunk({'lat': 2}),
+                                     **kwargs)
+    eager = compute_perfect_model(PM_da_ds, PM_da_control, **kwargs)
+    _assert_lazy_equals_eager(lazy, eager)
+
+
+@pytest.mark.parametrize('metric', xskillscore_metrics)
+def test_compute_lazy(DPLE_da_ds, DPLE_da_reference, DPLE_da_control,
+                      metric):
+    """Reference, persistence and predictability horizon of chunked input
+    are dask-backed and computed only on request."""
+    ds = DPLE_da_ds.mean('member')
+    funcs = {
+        'reference': lambda ds, ref, ctrl: compute_reference(
+            ds, ref, metric=metric),
+        'persistence': lambda ds, ref, ctrl: compute_persistence(
+            ds, ref, 3, metric=metric),
+        'persistence_pm': lambda ds, ref, ctrl: compute_persistence_pm(
+            ds, ctrl, 3, metric=metric),
+        'horizon': lambda ds, ref, ctrl: xr_predictability_horizon(
+            compute_reference(ds, ref, metric=metric),
+            compute_persistence(ds, ref, 5, metric=metric),
+            perfect_model=True)}
+    for func in funcs.values():
+        with dask.config.set(scheduler=_raise_on_compute):
+            lazy = func(ds.chunk({'lat': 2}),
+                        DPLE_da_reference.chunk({'lat': 2}),
+                        DPLE_da_control.chunk({'lat': 2}))
+        _assert_lazy_equals_eager(lazy, func(ds, DPLE_da_reference,
+                                             DPLE_da_control))
+
+
+def test_bootstrap_perfect_model_lazy(DPLE_da_ds, DPLE_da_control):
+    """Bootstrapping chunked input builds the graph without computing."""
+    kwargs = dict(metric='rmse', comparison='m2e', bootstrap=3, seed=42)
+    with dask.config.set(scheduler=_raise_on_compute):
+        lazy = bootstrap_perfect_model(DPLE_da_ds.chunk({'lat': 2}),
+                                       DPLE_da_control.chunk({'lat': 2}),
+                                       **kwargs)
+    eager = bootstrap_perfect_model(DPLE_da_ds, DPLE_da_control, **kwargs)
+    _assert_lazy_equals_eager(lazy, eager)
@@ -0,0 +1,195 @@
+import dask
+import numpy as np
+import pytest
+import xarray as xr
+from dask.core import flatten
+from eofs.xarray import Eof
+
+from climpred import relative_entropy
+from climpred.relative_entropy import (_bootstrap_relative_entropy_iteration,
+                                       _control_eofs, _get_eofs,
+                                       _relative_entropy_formula,
+                                       bootstrap_relative_entropy,
+                                       compute_relative_entropy)
+
+
+@pytest.fixture
+def PM_ds_initialized():
+    data = np.random.rand(4, 8, 3, 3, 4)
+    return xr.Dataset(
+        {'tos': (('initialization', 'member', 'time', 'lat', 'lon'), data)},
+        coords={'initialization': [3004, 3009, 3014, 3019],
+                'member': np.arange(8), 'time': np.arange(1, 4),
+                'lat': np.linspace(-40, 40, 3), 'lon': np.arange(4)})
+
+
+@pytest.fixture
+def PM_ds_control():
+    data = np.random.rand(100, 3, 4)
+    return xr.Dataset(
+        {'tos': (('initialization', 'lat', 'lon'), data)},
+        coords={'initialization': np.arange(3000, 3100),
+                'lat': np.linspace(-40, 40, 3), 'lon': np.arange(4)})
+
+
+@pytest.mark.parametrize('curv', [True, False])
+def test_compute_relative_entropy_equals_loop(PM_ds_initialized,
+                                              PM_ds_control, curv):
+    """Batched projections match projecting field by field."""
+    neofs = 4
+    np.random.seed(0)
+    actual = compute_relative_entropy(PM_ds_initialized, PM_ds_control,
+                                      neofs=neofs, curv=curv,
+                                      anomaly_data=True)
+    assert actual.R.dims == ('initialization', 'time')
+
+    wgts = None
+    if not curv:
+        coslat = np.cos(np.deg2rad(PM_ds_control.lat.values))
+        wgts = np.sqrt(coslat)[..., np.newaxis]
+    solver = Eof(PM_ds_control.to_array().squeeze().rename(
+        {'initialization': 'time'}), weights=wgts)
+    initialized = PM_ds_initialized.to_array().squeeze()
+    # same pseudo-members as drawn in compute_relative_entropy
+    np.random.seed(0)
+    starts = [np.random.randint(0, 100 - 3 - 1, 10) for _ in range(4)]
+    control = PM_ds_control.to_array().squeeze()
+    for i, init in enumerate(initialized.initialization.values):
+        for t in initialized.time.values:
+            fields = {
+                'b': xr.concat([control.isel(initialization=s + t - 1)
+                                for s in starts[i]], 'time'),
+                'x': initialized.sel(initialization=init, time=t)
+                .drop('time').rename({'member': 'time'})}
+            pcs = {k: solver.projectField(v, neofs=neofs, eofscaling=0,
+                                          weighted=False).values
+                   for k, v in fields.items()}
+            r, d, s = _relative_entropy_formula(
+                np.cov(pcs['b'].T), np.cov(pcs['x'].T),
+                pcs['x'].mean(0), pcs['b'].mean(0), neofs)
+            res = actual.sel(initialization=init, time=t)
+            np.testing.assert_allclose([res.R, res.D, res.S], [r, d, s])
+
+
+def test_relative_entropy_formula():
+    """Batched formula equals the Kleeman 2002 relative entropy of every
+    pair of Gaussians in the stack."""
+    neofs = 4
+    a = np.random.randn(2, 3, neofs, 2 * neofs)
+    sigma_b = np.matmul(a, a.swapaxes(-1, -2))
+    a = np.random.randn(2, 3, neofs, 2 * neofs)
+    sigma_x = np.matmul(a, a.swapaxes(-1, -2))
+    mu_b = np.random.randn(2, 3, neofs)
+    mu_x = np.random.randn(2, 3, neofs)
+    R, D, S = _relative_entropy_formula(sigma_b, sigma_x, mu_x, mu_b, neofs)
+    assert R.shape == (2, 3)
+    for i in range(2):
+        for j in range(3):
+            sigma_b_inv = np.linalg.inv(sigma_b[i, j])
+            diff = mu_x[i, j] - mu_b[i, j]
+            dispersion = 0.5 * (
+                np.log(np.linalg.det(sigma_b[i, j]) /
+                       np.linalg.det(sigma_x[i, j])) +
+                np.trace(sigma_b_inv @ sigma_x[i, j]) - neofs)
+            signal = 0.5 * diff @ sigma_b_inv @ diff
+            np.testing.assert_allclose([D[i, j], S[i, j], R[i, j]],
+                                       [dispersion, signal,
+                                        dispersion + signal])
+
+
+def test_relative_entropy_formula_many_eofs():
+    """Determinants of 60 small eigenvalues underflow, log determinants do
+    not."""
+    neofs = 60
+    sigma_b = 1e-8 * np.eye(neofs)
+    sigma_x = 0.5e-8 * np.eye(neofs)
+    R, D, S = _relative_entropy_formula(sigma_b, sigma_x, np.zeros(neofs),
+                                        np.zeros(neofs), neofs)
+    np.testing.assert_allclose(D, 0.5 * neofs * (np.log(2) - 0.5))
+    assert S == 0
+
+
+def test_eof_cache(PM_ds_control, tmpdir, monkeypatch):
+    """EOFs are computed once per base field and restored from file."""
+    base = PM_ds_control.tos.rename({'initialization': 'time'})
+    eof_cache = str(tmpdir.join('eofs.nc'))
+    expected = _get_eofs(base, 3, eof_cache=eof_cache)
+    assert expected.eofs.dims == ('mode', 'lat', 'lon')
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('EOFs recomputed')
+
+    monkeypatch.setattr(relative_entropy, 'Eof', _fail)
+    # from memory, also for fewer EOFs
+    xr.testing.assert_identical(_get_eofs(base, 3), expected)
+    xr.testing.assert_identical(_get_eofs(base, 2),
+                                expected.isel(mode=slice(0, 2)))
+    # from file
+    relative_entropy._EOF_CACHE.clear()
+    xr.testing.assert_allclose(_get_eofs(base, 3, eof_cache=eof_cache),
+                               expected)
+    # different data or coordinates are not served from the cache
+    with pytest.raises(AssertionError):
+        _get_eofs(base + 1, 3, eof_cache=eof_cache)
+    with pytest.raises(AssertionError):
+        _get_eofs(base.assign_coords(lon=base.lon + 1), 3)
+
+
+@pytest.mark.parametrize('chunk', [False, True])
+def test_get_eofs_randomized(chunk):
+    """Randomized truncated SVD finds the leading EOFs of the full SVD."""
+    modes = np.random.randn(4, 6 * 8)
+    pcs = np.random.randn(200, 4) * np.array([8, 6, 4, 2])
+    data = pcs @ modes + 0.1 * np.random.randn(200, 6 * 8)
+    base = xr.DataArray(data.reshape(200, 6, 8), dims=['time', 'lat', 'lon'],
+                        coords={'lat': np.linspace(-50, 50, 6),
+                                'lon': np.arange(8)})
+    base[:, 0, 0] = np.nan
+    if chunk:
+        base = base.chunk({'time': 50})
+    weights = np.sqrt(np.cos(np.deg2rad(base.lat.values)))[..., np.newaxis]
+    relative_entropy._EOF_CACHE.clear()
+    computed = []
+    passes = []
+
+    def _record_keys(dsk, keys, **kwargs):
+        passes.append(keys)
+        computed.extend(flatten(keys))
+        return dask.get(dsk, keys, **kwargs)
+
+    with dask.config.set(scheduler=_record_keys):
+        actual = _get_eofs(base, 3, weights=weights, svd='randomized')
+    if chunk:
+        # only reductions of the input are computed, never the input
+        # itself, and all of them in one pass over the input
+        assert len(passes) == 1
+        assert not set(flatten(base.data.__dask_keys__())) & set(computed)
+    expected = _get_eofs(base, 3, weights=weights)
+    assert actual.eofs.dims == expected.eofs.dims
+    assert actual.eofs.isnull().equals(expected.eofs.isnull())
+    # EOFs are unique up to their sign
+    projection = xr.dot(actual.eofs.fillna(0),
+                        expected.eofs.fillna(0).rename({'mode': 'mode2'}))
+    np.testing.assert_allclose(abs(projection), np.eye(3), atol=1e-6)
+    np.testing.assert_allclose(actual.eigenvalues, expected.eigenvalues)
+
+
+def test_bootstrap_relative_entropy(PM_ds_initialized, PM_ds_control):
+    """All iterations are used and results do not depend on the number of
+    workers."""
+    kwargs = dict(bootstrap=3, neofs=2, seed=42)
+    actual = bootstrap_relative_entropy(PM_ds_initialized, PM_ds_control,
+                                        **kwargs)
+    seeds = np.random.RandomState(42).randint(np.iinfo(np.int32).max,
+                                              size=3)
+    eofs = _control_eofs(PM_ds_control, 2)
+    expected = xr.concat([
+        _bootstrap_relative_entropy_iteration(
+            seed, PM_ds_initialized, PM_ds_control, eofs, neofs=2,
+            ntime=3, nmember_control=15)
+        for seed in seeds], 'it').quantile(0.95, ['it', 'time',
+                                                  'initialization'])
+    xr.testing.assert_allclose(actual, expected)
+    parallel = bootstrap_relative_entropy(PM_ds_initialized, PM_ds_control,
+                                          n_jobs=2, **kwargs)
+    xr.testing.assert_identical(actual, parallel)
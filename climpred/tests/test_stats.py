@@ -2,7 +2,12 @@ import pytest
 import numpy as np
 import xarray as xr
 
-from climpred.stats import xr_rm_trend
+from climpred import bootstrap, stats
+from climpred.bootstrap import (DPP_threshold,
+                                xr_varweighted_mean_period_threshold)
+from climpred.stats import (DPP, _xr_pearson_r_p_value, xr_autocorr,
+                            xr_corr, xr_rm_trend, xr_varweighted_mean_period)
+from xskillscore import pearson_r, pearson_r_p_value
 
 
 @pytest.fixture
@@ -17,6 +22,16 @@ def two_dim_da():
     return da
 
 
+@pytest.fixture
+def autocorrelated_da():
+    time = np.arange(50)
+    noise = np.random.randn(50, 3)
+    data = noise.copy()
+    for t in range(1, 50):  # AR(1) process
+        data[t] = 0.5 * data[t - 1] + noise[t]
+    return xr.DataArray(data, coords=[time, np.arange(3)], dims=['time', 'lat'])
+
+
 @pytest.fixture
 def multi_dim_ds():
     ds = xr.tutorial.open_dataset('air_temperature')
@@ -87,3 +102,120 @@ def test_xr_rm_trend_3d_dataset_dim_order(multi_dim_ds):
     # ensure the dims are back in its original state
     assert list(multi_dim_ds_dt['air'].dims) == ['lon', 'time', 'lat']
     assert list(multi_dim_ds_dt['airx2'].dims) == ['lon', 'time', 'lat']
+
+
+def test_xr_corr_matches_pearson_r(autocorrelated_da):
+    y = autocorrelated_da + 0.5 * autocorrelated_da.shift(time=1).fillna(0)
+    r, p = xr_corr(autocorrelated_da, y, return_p=True)
+    xr.testing.assert_allclose(r, pearson_r(autocorrelated_da, y, 'time'))
+    # effective sample size is smaller, so p values can only be larger
+    assert (p >= pearson_r_p_value(autocorrelated_da, y, 'time')).all()
+    assert p.dims == r.dims
+
+
+def test_xr_autocorr_return_p(autocorrelated_da):
+    r, p = xr_autocorr(autocorrelated_da, lag=2, return_p=True)
+    normal = autocorrelated_da.isel(time=slice(0, 48))
+    shifted = autocorrelated_da.isel(time=slice(2, 50))
+    shifted['time'] = normal['time']
+    xr.testing.assert_allclose(r, pearson_r(normal, shifted, 'time'))
+    xr.testing.assert_allclose(p, pearson_r_p_value(normal, shifted, 'time'))
+
+
+@pytest.mark.parametrize('sign', [1, -1])
+def test_xr_pearson_r_p_value_perfect_correlation(sign):
+    """Linearly dependent series give |r| == 1 and p values of 0."""
+    a = xr.DataArray(np.random.RandomState(0).randn(50, 20),
+                     dims=['time', 'lat'])
+    r, p = _xr_pearson_r_p_value(a, sign * 2 * a + 1, 'time')
+    assert (np.abs(r) <= 1).all()
+    np.testing.assert_allclose(r, sign)
+    assert not p.isnull().any()
+    np.testing.assert_allclose(p, 0)
+
+
+def test_pearson_r_without_p_skips_t_test(autocorrelated_da, monkeypatch):
+    """r-only callers do not run the t-test of the fused kernel."""
+    y = autocorrelated_da + autocorrelated_da.shift(time=1).fillna(0)
+    expected = pearson_r(autocorrelated_da, y, 'time')
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('p value computed')
+
+    monkeypatch.setattr(stats, '_np_t_test_p_value', _fail)
+    xr.testing.assert_allclose(
+        _xr_pearson_r_p_value(autocorrelated_da, y, 'time', return_p=False),
+        expected)
+    xr.testing.assert_allclose(xr_corr(autocorrelated_da, y), expected)
+    xr_autocorr(autocorrelated_da)
+
+
+@pytest.mark.parametrize('threshold', [DPP_threshold,
+                                       xr_varweighted_mean_period_threshold])
+def test_control_threshold_matches_loop(autocorrelated_da, threshold):
+    """Batched thresholds draw the same resamples as looping over them."""
+    func = {DPP_threshold: DPP,
+            xr_varweighted_mean_period_threshold: xr_varweighted_mean_period}
+    time = autocorrelated_da.time.values
+    np.random.seed(42)
+    expected = []
+    for _ in range(5):
+        smp_control = autocorrelated_da.sel(
+            time=np.random.choice(time, len(time)))
+        smp_control['time'] = time
+        expected.append(func[threshold](smp_control))
+    expected = xr.concat(expected, 'bootstrap').quantile(0.95, 'bootstrap')
+    np.random.seed(42)
+    actual = threshold(autocorrelated_da, bootstrap=5)
+    xr.testing.assert_allclose(actual, expected)
+    np.random.seed(42)
+    actual = threshold(autocorrelated_da, bootstrap=5, n_jobs=2,
+                       batch_size=2)
+    xr.testing.assert_allclose(actual, expected)
+
+
+@pytest.mark.parametrize('threshold', [DPP_threshold,
+                                       xr_varweighted_mean_period_threshold])
+def test_control_threshold_default_batches(autocorrelated_da, threshold,
+                                           monkeypatch):
+    """By default resamples are evaluated in batches bounded by memory, not
+    all at once."""
+    batch_sizes = []
+    resampled_control_statistic = bootstrap._resampled_control_statistic
+
+    def record(index, **kwargs):
+        batch_sizes.append(len(index))
+        return resampled_control_statistic(index, **kwargs)
+
+    np.random.seed(42)
+    expected = threshold(autocorrelated_da, bootstrap=20, batch_size=20)
+    monkeypatch.setattr(bootstrap, '_CONTROL_BATCH_BYTES',
+                        3 * autocorrelated_da.nbytes)
+    monkeypatch.setattr(bootstrap, '_resampled_control_statistic', record)
+    np.random.seed(42)
+    actual = threshold(autocorrelated_da, bootstrap=20)
+    assert batch_sizes == [3] * 6 + [2]
+    xr.testing.assert_allclose(actual, expected)
+
+
+@pytest.mark.parametrize('threshold', [DPP_threshold,
+                                       xr_varweighted_mean_period_threshold])
+def test_control_threshold_n_jobs_zero(autocorrelated_da, threshold):
+    with pytest.raises(ValueError):
+        threshold(autocorrelated_da, bootstrap=5, n_jobs=0)
+
+
+@pytest.mark.parametrize('m', [5, 7])
+def test_DPP_chunks(autocorrelated_da, m):
+    """Chunked DPP equals the Boer 2004 formula on reshaped chunks, also for
+    dask-backed controls."""
+    nchunks = autocorrelated_da.time.size // m
+    chunks = autocorrelated_da.values[:nchunks * m].reshape(nchunks, m, -1)
+    s2v = chunks.mean(1).var(0)
+    s2e = (chunks - chunks.mean(1, keepdims=True)).var((0, 1))
+    s2 = s2v + s2e
+    expected = (s2v - s2 / m) / s2
+    np.testing.assert_allclose(DPP(autocorrelated_da, m=m).values, expected)
+    actual = DPP(autocorrelated_da.chunk({'time': 10}), m=m)
+    assert actual.chunks is not None
+    np.testing.assert_allclose(actual.values, expected)
@@ -0,0 +1,26 @@
+"""Helper functions shared by the climpred modules."""
+import dask
+import xarray as xr
+
+
+def _content_key(obj, *args):
+    """Key identifying the data and coordinates of an xarray object together
+    with further arguments.
+
+    numpy data are hashed by content, dask-backed data by their
+    deterministic graph name, so the key is computed without loading data.
+
+    Args:
+        obj (xarray object): object to identify.
+        *args: further arguments the key depends on.
+
+    Returns:
+        key (str): token of obj and args.
+    """
+    if isinstance(obj, xr.Dataset):
+        arrays = [(k, v.dims, v.data) for k, v in sorted(
+            obj.data_vars.items())]
+    else:
+        arrays = [(obj.name, obj.dims, obj.data)]
+    coords = [(k, v.dims, v.data) for k, v in sorted(obj.coords.items())]
+    return dask.base.tokenize(type(obj).__name__, arrays, coords, *args)